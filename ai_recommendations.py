@@ -1,23 +1,174 @@
 import os
 import json
-from openai import OpenAI
+import asyncio
+import concurrent.futures
+from openai_client import (
+    get_openai_client, create_async_openai_client, call_with_retries, call_with_retries_async,
+    get_openai_metrics
+)
+from recommendation_cache import get_recommendation_cache, make_cache_key
+from similar_plans import get_similar_plan_index
+from recommendation_grid import get_pregenerated_store
+from local_recommendations import local_recommendation
+from single_flight import SingleFlight
+from rate_limiter import estimate_tokens, PRIORITIES, DEFAULT_PRIORITY
 
-def get_openai_client():
-    """Get OpenAI client if API key is available"""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+MODEL = "gpt-4o"
+
+# Identical requests in flight at the same time share one upstream call
+_in_flight = SingleFlight()
+
+# Profile fields that feed the personalized plan prompt (and therefore its cache key)
+PLAN_PROFILE_FIELDS = ("age", "weight", "height", "gender", "activity_level", "goal")
+
+def _missing_api_key_error():
+    return {
+        "error": "OpenAI API key not set. AI recommendations are not available.",
+        "message": "Please set up your OpenAI API key to enable AI recommendations."
+    }
+
+def _without_api_key(kind, inputs):
+    """Serve the rule-based recommendation when no API key is set, unless AI_LOCAL_FALLBACK is off"""
+    if os.environ.get('AI_LOCAL_FALLBACK', 'true').lower() in ('1', 'true', 'yes'):
+        return local_recommendation(kind, inputs)
+    return _missing_api_key_error()
+
+def _get_json_completion(kind, inputs, prompt, error_title):
+    """Get a JSON completion for the prompt, serving repeat requests from the cache
+
+    `inputs` are the values the prompt was built from; they form the cache key.
+    Offline-generated grid results are served first, and diet plans cached for
+    a near-identical profile are reused on an exact miss.
+    Identical requests already in flight share one upstream call. Only
+    successful responses are cached.
+    """
+    cache = get_recommendation_cache()
+    key = make_cache_key(kind, inputs, MODEL)
+    cached = _get_cached(cache, kind, inputs, key)
+    if cached is not None:
+        return cached
 
-def get_diet_recommendations(age, weight, height, gender, activity_level, goal, current_diet=None):
-    """Get personalized diet recommendations using OpenAI"""
     client = get_openai_client()
     if not client:
+        return _without_api_key(kind, inputs)
+    return _in_flight.do(key, _request_completion, client, kind, inputs, key, prompt, error_title)
+
+def _get_cached(cache, kind, inputs, key):
+    """Get a pregenerated or cached response, else one cached for the nearest similar profile"""
+    cached = get_pregenerated_store().get(kind, inputs, MODEL)
+    if cached is not None:
+        return cached
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    index = get_similar_plan_index()
+    similar_key = index.lookup(kind, inputs)
+    if similar_key is None:
+        return None
+    cached = cache.get(similar_key)
+    if cached is None:
+        index.discard(kind, similar_key)
+    return cached
+
+def _store(kind, inputs, key, content):
+    """Cache a successful response and index it for similar-profile reuse"""
+    get_recommendation_cache().put(key, kind, content, inputs)
+    get_similar_plan_index().add(kind, key, inputs)
+
+def _request_completion(client, kind, inputs, key, prompt, error_title):
+    """Call the API for a JSON completion and cache it on success"""
+    try:
+        response = call_with_retries(
+            client.chat.completions.create,
+            rate_limit=_rate_limit(kind, prompt),
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+    except Exception as e:
         return {
-            "error": "OpenAI API key not set. AI recommendations are not available.",
-            "message": "Please set up your OpenAI API key to enable AI recommendations."
+            "error": error_title,
+            "message": str(e)
         }
+    _store(kind, inputs, key, content)
+    return content
+
+def _rate_limit(kind, prompt):
+    """(estimated tokens, queue priority) for the rate limiter"""
+    return estimate_tokens(kind, prompt), PRIORITIES.get(kind, DEFAULT_PRIORITY)
+
+def get_coalescing_stats():
+    """Get how many AI requests were served by joining an identical in-flight call"""
+    return _in_flight.stats()
+
+def get_similarity_stats():
+    """Get similar-plan reuse hit rate and the upstream seconds it saved"""
+    return get_similar_plan_index().stats(get_openai_metrics()['latency_avg'])
+
+class JSONSectionParser:
+    """Incrementally split a streamed JSON object into its top-level members
+
+    feed() takes raw text chunks and returns the (key, value) pairs whose
+    values closed within them, so each section can be shown as soon as the
+    model finishes writing it. Members that fail to parse are kept in
+    `unparsed` instead of aborting the stream.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member = None
+        self.unparsed = []
 
+    def feed(self, chunk):
+        sections = []
+        for char in chunk:
+            if self.member is not None:
+                self.member.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+                if self.depth == 1:
+                    self.member = []
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0 and self.member is not None:
+                    self._close_member(sections)
+                    self.member = None
+            elif char == ',' and self.depth == 1 and self.member is not None:
+                self._close_member(sections)
+                self.member = []
+        return sections
+
+    def leftover(self):
+        """Get the text of a member that was still open when the stream ended"""
+        return ''.join(self.member).strip() if self.member else ''
+
+    def _close_member(self, sections):
+        # The member buffer ends with the delimiter that closed it
+        text = ''.join(self.member[:-1]).strip()
+        if not text:
+            return
+        try:
+            sections.extend(json.loads('{' + text + '}').items())
+        except json.JSONDecodeError:
+            self.unparsed.append(text)
+
+def _diet_request(age, weight, height, gender, activity_level, goal):
+    """Build the (kind, inputs, prompt, error title) request for diet recommendations"""
     prompt = f"""
     As a nutrition expert, provide personalized diet recommendations for:
     - Age: {age}
@@ -42,28 +193,18 @@ def get_diet_recommendations(age, weight, height, gender, activity_level, goal,
     supplements, meal_prep_tips, dining_out_tips, hydration
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return {
-            "error": "Failed to get AI recommendations",
-            "message": str(e)
-        }
-
-def get_workout_recommendations(age, fitness_level, goal, medical_conditions=None):
-    """Get personalized workout recommendations using OpenAI"""
-    client = get_openai_client()
-    if not client:
-        return {
-            "error": "OpenAI API key not set. AI recommendations are not available.",
-            "message": "Please set up your OpenAI API key to enable AI recommendations."
-        }
+    return (
+        "diet",
+        {
+            "age": age, "weight": weight, "height": height, "gender": gender,
+            "activity_level": activity_level, "goal": goal
+        },
+        prompt,
+        "Failed to get AI recommendations"
+    )
 
+def _workout_request(age, fitness_level, goal, medical_conditions=None):
+    """Build the (kind, inputs, prompt, error title) request for workout recommendations"""
     prompt = f"""
     As a fitness expert, provide detailed workout recommendations for:
     - Age: {age}
@@ -89,28 +230,18 @@ def get_workout_recommendations(age, fitness_level, goal, medical_conditions=Non
     injury_prevention, rest_guidelines, cardio_integration
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return {
-            "error": "Failed to get AI recommendations",
-            "message": str(e)
-        }
-
-def get_personalized_diet_plan(profile, dietary_preferences):
-    """Get highly personalized diet recommendations using OpenAI"""
-    client = get_openai_client()
-    if not client:
-        return {
-            "error": "OpenAI API key not set. AI recommendations are not available.",
-            "message": "Please set up your OpenAI API key to enable AI recommendations."
-        }
+    return (
+        "workout",
+        {
+            "age": age, "fitness_level": fitness_level, "goal": goal,
+            "medical_conditions": medical_conditions or "None"
+        },
+        prompt,
+        "Failed to get AI recommendations"
+    )
 
+def _personalized_diet_plan_request(profile, dietary_preferences):
+    """Build the (kind, inputs, prompt, error title) request for a personalized diet plan"""
     prompt = f"""
     As a nutrition expert, create a highly personalized diet plan for someone with these characteristics:
     - Age: {profile['age']}
@@ -145,15 +276,213 @@ def get_personalized_diet_plan(profile, dietary_preferences):
     tracking_metrics, common_mistakes
     """
 
+    return (
+        "personalized_diet_plan",
+        {
+            "profile": {key: profile[key] for key in PLAN_PROFILE_FIELDS},
+            "dietary_preferences": dietary_preferences
+        },
+        prompt,
+        "Failed to get personalized diet plan"
+    )
+
+# Request builders by kind, for callers that generate recommendations from stored inputs
+REQUEST_BUILDERS = {
+    "diet": _diet_request,
+    "workout": _workout_request,
+    "personalized_diet_plan": _personalized_diet_plan_request
+}
+
+def get_diet_recommendations(age, weight, height, gender, activity_level, goal, current_diet=None):
+    """Get personalized diet recommendations using OpenAI"""
+    return _get_json_completion(*_diet_request(age, weight, height, gender, activity_level, goal))
+
+def get_workout_recommendations(age, fitness_level, goal, medical_conditions=None):
+    """Get personalized workout recommendations using OpenAI"""
+    return _get_json_completion(*_workout_request(age, fitness_level, goal, medical_conditions))
+
+def get_personalized_diet_plan(profile, dietary_preferences):
+    """Get highly personalized diet recommendations using OpenAI"""
+    return _get_json_completion(*_personalized_diet_plan_request(profile, dietary_preferences))
+
+def _stream_json_completion(kind, inputs, prompt, error_title):
+    """Yield (key, value) sections of a JSON completion as soon as each one closes
+
+    Cached responses are replayed section by section. Failures are yielded as a
+    single ("error", {...}) item. If the finished document is not valid JSON,
+    members that could not be split out are yielded under "unparsed".
+    """
+    cache = get_recommendation_cache()
+    cache_key = make_cache_key(kind, inputs, MODEL)
+    cached = _get_cached(cache, kind, inputs, cache_key)
+    if cached is not None:
+        yield from json.loads(cached).items()
+        return
+
+    client = get_openai_client()
+    if not client:
+        result = _without_api_key(kind, inputs)
+        if isinstance(result, dict):
+            yield "error", result
+        else:
+            yield from json.loads(result).items()
+        return
+
+    # Join an identical request already in flight and replay its result
+    flight, leader = _in_flight.begin(cache_key)
+    if not leader:
+        result = _in_flight.wait(flight)
+        if isinstance(result, dict):
+            yield "error", result
+        else:
+            yield from json.loads(result).items()
+        return
+
+    # The caller may stop consuming at any yield (e.g. right after an error item),
+    # so _stream_sections records its outcome here before yielding the final items
+    outcome = {'result': {"error": error_title, "message": "The AI request was interrupted."}}
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+        content = yield from _stream_sections(client, kind, prompt, error_title, outcome)
+        if isinstance(content, str):
+            _store(kind, inputs, cache_key, content)
+    finally:
+        _in_flight.complete(cache_key, flight, result=outcome['result'])
+
+def _stream_sections(client, kind, prompt, error_title, outcome):
+    """Yield sections from a streamed completion; returns the full JSON text or an error dict
+
+    outcome['result'] is set to the return value before the items that end the
+    stream are yielded, so it is known even if the consumer closes the generator.
+    """
+    parser = JSONSectionParser()
+    received = []
+    seen = set()
+    try:
+        stream = call_with_retries(
+            client.chat.completions.create,
+            rate_limit=_rate_limit(kind, prompt),
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            received.append(chunk.choices[0].delta.content)
+            for key, value in parser.feed(chunk.choices[0].delta.content):
+                seen.add(key)
+                yield key, value
+    except Exception as e:
+        error = {"error": error_title, "message": str(e)}
+        outcome['result'] = error
+        yield "error", error
+        return error
+
+    content = ''.join(received)
+    try:
+        document = json.loads(content)
+    except json.JSONDecodeError:
+        error = {"error": error_title, "message": "The AI response was not valid JSON."}
+        outcome['result'] = error
+        unparsed = parser.unparsed + ([parser.leftover()] if parser.leftover() else [])
+        if unparsed:
+            yield "unparsed", "\n\n".join(unparsed)
+        elif not seen:
+            yield "error", error
+        return error
+
+    outcome['result'] = content
+    # Anything the incremental parser missed still reaches the caller
+    for key, value in document.items():
+        if key not in seen:
+            yield key, value
+    return content
+
+def stream_diet_recommendations(age, weight, height, gender, activity_level, goal):
+    """Stream diet recommendation sections as (key, value) pairs"""
+    return _stream_json_completion(*_diet_request(age, weight, height, gender, activity_level, goal))
+
+def stream_workout_recommendations(age, fitness_level, goal, medical_conditions=None):
+    """Stream workout recommendation sections as (key, value) pairs"""
+    return _stream_json_completion(*_workout_request(age, fitness_level, goal, medical_conditions))
+
+async def _get_json_completion_async(client, kind, inputs, prompt, error_title):
+    """Async counterpart of _get_json_completion; cache I/O runs in a worker thread"""
+    cache = get_recommendation_cache()
+    key = make_cache_key(kind, inputs, MODEL)
+    cached = await asyncio.to_thread(_get_cached, cache, kind, inputs, key)
+    if cached is not None:
+        return cached
+
+    if client is None:
+        return _without_api_key(kind, inputs)
+    return await _in_flight.do_async(
+        key, _request_completion_async, client, kind, inputs, key, prompt, error_title
+    )
+
+async def _request_completion_async(client, kind, inputs, key, prompt, error_title):
+    """Async counterpart of _request_completion"""
+    try:
+        response = await call_with_retries_async(
+            client.chat.completions.create,
+            rate_limit=_rate_limit(kind, prompt),
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"}
         )
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
     except Exception as e:
         return {
-            "error": "Failed to get personalized diet plan",
+            "error": error_title,
             "message": str(e)
-        }
\ No newline at end of file
+        }
+    await asyncio.to_thread(_store, kind, inputs, key, content)
+    return content
+
+async def get_all_recommendations_async(profile, dietary_preferences=None):
+    """Request diet, workout and (with preferences) personalized plans concurrently
+
+    Returns a dict keyed by "diet", "workout" and "personalized_diet_plan"; the
+    last is omitted when no dietary preferences are given.
+    """
+    requests = {
+        "diet": _diet_request(
+            profile['age'], profile['weight'], profile['height'],
+            profile['gender'], profile['activity_level'], profile['goal']
+        ),
+        "workout": _workout_request(
+            profile['age'], profile['fitness_level'], profile['goal'],
+            profile.get('medical_conditions')
+        )
+    }
+    if dietary_preferences:
+        requests["personalized_diet_plan"] = _personalized_diet_plan_request(profile, dietary_preferences)
+
+    client = create_async_openai_client()
+    try:
+        results = await asyncio.gather(*(
+            _get_json_completion_async(client, *request) for request in requests.values()
+        ))
+    finally:
+        if client is not None:
+            await client.close()
+    return dict(zip(requests, results))
+
+def _run_coroutine(coroutine):
+    """Run a coroutine to completion from synchronous code
+
+    Streamlit script threads normally have no running event loop, so asyncio.run
+    works directly; if one is running, the coroutine gets its own loop in a
+    helper thread instead of failing.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+def get_all_recommendations(profile, dietary_preferences=None):
+    """Generate all recommendation plans concurrently; wall time is the slowest single request"""
+    return _run_coroutine(get_all_recommendations_async(profile, dietary_preferences))
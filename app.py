@@ -1,15 +1,24 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import json
-import pandas as pd
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
 from utils import (
     calculate_bmr, calculate_tdee, get_macro_split,
-    get_workout_recommendation, get_default_profile_photo, download_user_data
+    get_workout_recommendation, get_default_profile_photo, download_user_data,
+    downsample_weight_history
 )
 from data_manager import DataManager
-from ai_recommendations import get_diet_recommendations, get_workout_recommendations, get_personalized_diet_plan
+from data_export import write_export, export_file_name
+from ai_recommendations import (
+    get_all_recommendations, stream_diet_recommendations, stream_workout_recommendations,
+    PLAN_PROFILE_FIELDS
+)
+from recommendation_jobs import get_job_executor, SUCCEEDED, FAILED, CANCELLED, FINISHED_STATUSES
+from meal_optimizer import suggest_meal
+from food_catalog import get_food_catalog
+from local_recommendations import (
+    local_diet_recommendations, local_workout_recommendations, local_personalized_diet_plan
+)
 
 # Initialize session state
 try:
@@ -19,11 +28,39 @@ except Exception as e:
     st.error(f"Failed to connect to database: {str(e)}")
     st.stop()
 
-if 'profile' not in st.session_state:
-    st.session_state.profile = {}
+# Weight chart zoom levels in days (None = full history) and point budgets
+WEIGHT_CHART_RANGES = {"1M": 30, "3M": 90, "6M": 182, "1Y": 365, "All": None}
+MAX_WEIGHT_CHART_POINTS = 2000
+WEBGL_POINT_THRESHOLD = 500
+
 if 'edit_index' not in st.session_state:
     st.session_state.edit_index = None
 
+ACTIVITY_LEVELS = ["Sedentary", "Lightly Active", "Moderately Active", "Very Active", "Extra Active"]
+GOALS = ["Weight Loss", "Muscle Gain", "Maintenance"]
+FITNESS_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+PROFILE_REQUIRED_FIELDS = PLAN_PROFILE_FIELDS + ("fitness_level",)
+
+
+def get_profile():
+    """Get the saved profile ({} until one is saved); DataManager caches it per process"""
+    return st.session_state.data_manager.get_profile()
+
+
+def profile_complete(profile):
+    """Whether the profile has every field the trackers and recommendations read
+
+    A saved profile can be partial (e.g. only a photo), so pages check this
+    rather than whether the profile is empty.
+    """
+    return all(profile.get(field) not in (None, '') for field in PROFILE_REQUIRED_FIELDS)
+
+
+def option_index(options, value):
+    """Index of a saved value among selectbox options, defaulting to the first"""
+    return options.index(value) if value in options else 0
+
+
 def set_mobile_responsive_config():
     st.set_page_config(
         page_title="Health & Fitness Tracker",
@@ -80,54 +117,55 @@ def main():
 
 def show_profile_page():
     st.header("Profile Settings")
+    profile = get_profile()
 
     # Display profile photo with default if none exists
     col1, col2 = st.columns([1, 3])
     with col1:
-        if 'photo' in st.session_state.profile:
-            st.image(st.session_state.profile['photo'], width=150)
+        if 'photo' in profile:
+            st.image(profile['photo'], width=150)
         else:
             st.image(get_default_profile_photo(), width=150)
 
         # Add photo upload button
         photo = st.file_uploader("Update Photo", type=['jpg', 'jpeg', 'png'], key="profile_photo")
-        if photo:
-            st.session_state.profile['photo'] = photo
+        if photo and photo.getvalue() != profile.get('photo'):
+            st.session_state.data_manager.save_profile({'photo': photo.getvalue()})
             st.rerun()
 
     with col2:
         with st.form("profile_form"):
             col1, col2 = st.columns(2)
             with col1:
-                first_name = st.text_input("First Name", value=st.session_state.profile.get('first_name', ''))
-                height = st.number_input("Height (cm)", 100, 250, value=st.session_state.profile.get('height', 170))
-                gender = st.selectbox("Gender", ["Male", "Female"], index=0 if st.session_state.profile.get('gender') == "Male" else 1)
+                first_name = st.text_input("First Name", value=profile.get('first_name', ''))
+                height = st.number_input("Height (cm)", 100, 250, value=int(profile.get('height', 170)))
+                gender = st.selectbox("Gender", ["Male", "Female"], index=0 if profile.get('gender') == "Male" else 1)
                 activity_level = st.selectbox(
                     "Activity Level",
-                    ["Sedentary", "Lightly Active", "Moderately Active", "Very Active", "Extra Active"],
-                    index=0
+                    ACTIVITY_LEVELS,
+                    index=option_index(ACTIVITY_LEVELS, profile.get('activity_level'))
                 )
                 goal = st.selectbox(
                     "Goal",
-                    ["Weight Loss", "Muscle Gain", "Maintenance"],
-                    index=0
+                    GOALS,
+                    index=option_index(GOALS, profile.get('goal'))
                 )
 
             with col2:
-                last_name = st.text_input("Last Name", value=st.session_state.profile.get('last_name', ''))
-                weight = st.number_input("Weight (kg)", 30, 300, value=st.session_state.profile.get('weight', 70))
-                ethnicity = st.text_input("Ethnicity", value=st.session_state.profile.get('ethnicity', ''))
-                age = st.number_input("Age", 15, 100, value=st.session_state.profile.get('age', 30))
+                last_name = st.text_input("Last Name", value=profile.get('last_name', ''))
+                weight = st.number_input("Weight (kg)", 30, 300, value=int(profile.get('weight', 70)))
+                ethnicity = st.text_input("Ethnicity", value=profile.get('ethnicity', ''))
+                age = st.number_input("Age", 15, 100, value=int(profile.get('age', 30)))
                 fitness_level = st.selectbox(
                     "Fitness Level",
-                    ["Beginner", "Intermediate", "Advanced"],
-                    index=0
+                    FITNESS_LEVELS,
+                    index=option_index(FITNESS_LEVELS, profile.get('fitness_level'))
                 )
 
-            medical_conditions = st.text_area("Medical Conditions (if any)", value=st.session_state.profile.get('medical_conditions', ''))
+            medical_conditions = st.text_area("Medical Conditions (if any)", value=profile.get('medical_conditions', ''))
 
             if st.form_submit_button("Save Profile"):
-                st.session_state.profile.update({
+                st.session_state.data_manager.save_profile({
                     'first_name': first_name,
                     'last_name': last_name,
                     'ethnicity': ethnicity,
@@ -158,14 +196,28 @@ def show_profile_page():
     show_diet_preferences_section()
     st.markdown("---")
     st.subheader("Download Your Data")
+    export_format = st.radio(
+        "Export Format",
+        ["ndjson", "csv"],
+        format_func=lambda value: "JSON Lines" if value == "ndjson" else "CSV",
+        horizontal=True
+    )
+    compress = st.checkbox("Compress (gzip)")
+    st.caption(
+        "CSV holds food and weight entries only; JSON Lines also includes your profile and "
+        "dietary preferences. For very long histories, `python data_export.py` streams the "
+        "export without loading it into memory."
+    )
     if st.button("Export Fitness Data"):
-        data = download_user_data()
+        data = download_user_data(export_format, compress)
         if data:
             st.download_button(
-                label="Download JSON",
+                label="Download Full History",
                 data=data,
-                file_name="fitness_data.json",
-                mime="application/json"
+                file_name=export_file_name(export_format, compress),
+                mime="application/gzip" if compress else (
+                    "text/csv" if export_format == "csv" else "application/x-ndjson"
+                )
             )
             st.info("Your data has been prepared for download. Click the button above to save it.")
 
@@ -174,102 +226,18 @@ def show_food_tracking_page():
     st.header("Food Tracking")
 
     try:
-        # Display daily totals
-        daily_totals = st.session_state.data_manager.get_daily_totals()
-        st.subheader("Today's Totals")
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Calories", f"{int(daily_totals['calories'])} kcal")
-        c2.metric("Protein", f"{int(daily_totals['protein'])}g")
-        c3.metric("Carbs", f"{int(daily_totals['carbs'])}g")
-        c4.metric("Fats", f"{int(daily_totals['fats'])}g")
-
-        # Add/Edit food form
-        st.subheader("Add Food" if st.session_state.edit_index is None else "Edit Food")
-        with st.form("food_entry"):
-            food = st.text_input("Food Item")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                calories = st.number_input("Calories", 0, 2000)
-            with col2:
-                protein = st.number_input("Protein (g)", 0, 200)
-            with col3:
-                carbs = st.number_input("Carbs (g)", 0, 200)
-            with col4:
-                fats = st.number_input("Fats (g)", 0, 200)
-
-            if st.form_submit_button("Save"):
-                if st.session_state.edit_index is not None:
-                    st.session_state.data_manager.update_food_entry(
-                        st.session_state.edit_index,
-                        food, calories, protein, carbs, fats
-                    )
-                    st.session_state.edit_index = None
-                    st.success("Food entry updated successfully!")
-                else:
-                    st.session_state.data_manager.add_food_entry(
-                        food, calories, protein, carbs, fats
-                    )
-                    st.success("Food entry added successfully!")
-                st.rerun()
-
-        # Create larger pie chart for macros
-        if sum([daily_totals['protein'], daily_totals['carbs'], daily_totals['fats']]) > 0:
-            fig = go.Figure(data=[go.Pie(
-                labels=['Protein', 'Carbs', 'Fats'],
-                values=[daily_totals['protein'] * 4, daily_totals['carbs'] * 4, daily_totals['fats'] * 9],
-                hole=.3
-            )])
-            fig.update_layout(
-                title="Macro Distribution",
-                height=500,  # Increased height
-                width=800,   # Set specific width
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.2,  # Move legend below chart
-                    xanchor="center",
-                    x=0.5
-                ),
-                margin=dict(t=60, b=100)  # Adjust margins
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-        # Food log table
-        st.subheader("Today's Food Log")
-        today_log = st.session_state.data_manager.get_todays_food_log()
-
-        for entry in today_log:
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
-            with col1:
-                st.write(entry['food'])
-            with col2:
-                st.write(f"{entry['calories']} kcal")
-            with col3:
-                st.write(f"{entry['protein']}g protein")
-            with col4:
-                st.write(f"{entry['carbs']}g carbs")
-            with col5:
-                st.write(f"{entry['fats']}g fats")
-            with col6:
-                if st.button("Edit", key=f"edit_{entry['id']}"):
-                    st.session_state.edit_index = entry['id']
-                    st.rerun()
-
-        # AI Diet Recommendations
-        if st.session_state.profile:
-            st.subheader("AI Diet Recommendations")
-            if st.button("Get AI Diet Suggestions"):
-                with st.spinner("Generating personalized diet recommendations..."):
-                    recommendations = get_diet_recommendations(
-                        st.session_state.profile['age'],
-                        st.session_state.profile['weight'],
-                        st.session_state.profile['height'],
-                        st.session_state.profile['gender'],
-                        st.session_state.profile['activity_level'],
-                        st.session_state.profile['goal']
-                    )
-                    show_diet_recommendations(recommendations)
+        # Totals, suggestions and the chart change only when food is logged, which reruns the app;
+        # the form, log and AI sections are fragments that rerun on their own
+        profile = get_profile()
+        daily_totals = st.session_state.data_manager.get_today_snapshot()['totals']
+        show_daily_totals(daily_totals)
+        if profile_complete(profile):
+            show_gap_suggestions(daily_totals)
+        show_food_entry_form()
+        show_macro_chart(daily_totals)
+        show_food_log()
+        if profile_complete(profile):
+            show_ai_diet_suggestions()
 
     except Exception as e:
         st.error(f"Error accessing food tracking data: {str(e)}")
@@ -279,10 +247,209 @@ def show_food_tracking_page():
     show_advanced_diet_recommendations()
 
 
+def show_daily_totals(daily_totals):
+    """Show today's calorie and macro totals"""
+    st.subheader("Today's Totals")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Calories", f"{int(daily_totals['calories'])} kcal")
+    c2.metric("Protein", f"{int(daily_totals['protein'])}g")
+    c3.metric("Carbs", f"{int(daily_totals['carbs'])}g")
+    c4.metric("Fats", f"{int(daily_totals['fats'])}g")
+
+
+@st.fragment
+def show_food_entry_form():
+    """Quick add, catalog search and the add food form; searching reruns only this fragment"""
+    st.subheader("Add Food")
+    show_quick_add()
+    show_food_search()
+    prefill = st.session_state.get('food_prefill') or {}
+    with st.form("food_entry"):
+        food = st.text_input("Food Item", value=prefill.get('name', ''))
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            calories = st.number_input("Calories", 0, 2000, value=min(2000, round(prefill.get('calories', 0))))
+        with col2:
+            protein = st.number_input("Protein (g)", 0, 200, value=min(200, round(prefill.get('protein', 0))))
+        with col3:
+            carbs = st.number_input("Carbs (g)", 0, 200, value=min(200, round(prefill.get('carbs', 0))))
+        with col4:
+            fats = st.number_input("Fats (g)", 0, 200, value=min(200, round(prefill.get('fats', 0))))
+
+        if st.form_submit_button("Save"):
+            st.session_state.data_manager.add_food_entry(
+                food, calories, protein, carbs, fats
+            )
+            st.success("Food entry added successfully!")
+            st.session_state.food_prefill = None
+            # Totals, chart and log outside this fragment changed too
+            st.rerun()
+
+
+def show_macro_chart(daily_totals):
+    """Show today's calories by macro as a pie chart"""
+    import plotly.graph_objects as go
+
+    if sum([daily_totals['protein'], daily_totals['carbs'], daily_totals['fats']]) > 0:
+        fig = go.Figure(data=[go.Pie(
+            labels=['Protein', 'Carbs', 'Fats'],
+            values=[daily_totals['protein'] * 4, daily_totals['carbs'] * 4, daily_totals['fats'] * 9],
+            hole=.3
+        )])
+        fig.update_layout(
+            title="Macro Distribution",
+            height=500,  # Increased height
+            width=800,   # Set specific width
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=-0.2,  # Move legend below chart
+                xanchor="center",
+                x=0.5
+            ),
+            margin=dict(t=60, b=100)  # Adjust margins
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def set_edit_index(entry_id):
+    """Open (or with None, close) the in-place editor for a food log entry"""
+    st.session_state.edit_index = entry_id
+
+
+@st.fragment
+def show_food_log():
+    """Today's food log with in-place editing; opening or cancelling an edit reruns only this fragment"""
+    st.subheader("Today's Food Log")
+    today_log = st.session_state.data_manager.get_today_snapshot()['log']
+
+    for entry in today_log:
+        if st.session_state.edit_index == entry['id']:
+            show_food_edit_form(entry)
+            continue
+        col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
+        with col1:
+            st.write(entry['food'])
+        with col2:
+            st.write(f"{entry['calories']} kcal")
+        with col3:
+            st.write(f"{entry['protein']}g protein")
+        with col4:
+            st.write(f"{entry['carbs']}g carbs")
+        with col5:
+            st.write(f"{entry['fats']}g fats")
+        with col6:
+            st.button("Edit", key=f"edit_{entry['id']}", on_click=set_edit_index, args=(entry['id'],))
+
+
+def show_food_edit_form(entry):
+    """Edit one logged food in place, pre-filled with its current values"""
+    with st.form(f"edit_food_{entry['id']}"):
+        food = st.text_input("Food Item", value=entry['food'])
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            calories = st.number_input("Calories", 0, 2000, value=min(2000, round(entry['calories'])))
+        with col2:
+            protein = st.number_input("Protein (g)", 0, 200, value=min(200, round(entry['protein'])))
+        with col3:
+            carbs = st.number_input("Carbs (g)", 0, 200, value=min(200, round(entry['carbs'])))
+        with col4:
+            fats = st.number_input("Fats (g)", 0, 200, value=min(200, round(entry['fats'])))
+
+        col1, col2 = st.columns(2)
+        if col1.form_submit_button("Save"):
+            st.session_state.data_manager.update_food_entry(
+                entry['id'], food, calories, protein, carbs, fats
+            )
+            st.session_state.edit_index = None
+            st.rerun()
+        col2.form_submit_button("Cancel", on_click=set_edit_index, args=(None,))
+
+
+@st.fragment
+def show_ai_diet_suggestions():
+    """Stream AI diet suggestions without rerunning the rest of the page"""
+    st.subheader("AI Diet Recommendations")
+    if st.button("Get AI Diet Suggestions"):
+        diet_args = diet_profile_args(get_profile())
+        with st.spinner("Generating personalized diet recommendations..."):
+            show_streamed_recommendations(
+                stream_diet_recommendations(*diet_args),
+                DIET_SECTIONS,
+                instant=local_diet_recommendations(*diet_args)
+            )
+
+
+def show_quick_add():
+    """Re-log a frequent or recent food with its last macros in one tap"""
+    foods = st.session_state.data_manager.get_quick_add_foods(limit=8)
+    if not foods:
+        return
+    st.caption("⚡ Quick add")
+    columns = st.columns(4)
+    for index, food in enumerate(foods):
+        label = f"{food['food']} · {food['calories']:.0f} kcal"
+        if columns[index % 4].button(label, key=f"quick_add_{index}", use_container_width=True):
+            st.session_state.data_manager.add_food_entry(
+                food['food'], food['calories'], food['protein'], food['carbs'], food['fats']
+            )
+            st.rerun()
+
+
+def set_food_prefill(food):
+    """Fill the add food form with a catalog match"""
+    st.session_state.food_prefill = food
+
+
+def show_food_search():
+    """Search the bundled food catalog and fill the food form with the chosen match"""
+    query = st.text_input("🔎 Search foods", key="food_search", placeholder="e.g. greek yogurt")
+    if not query:
+        return
+    matches = get_food_catalog().search(query, limit=5)
+    if not matches:
+        st.caption("No matching foods; enter the values manually.")
+    for index, match in enumerate(matches):
+        label = f"{match['name']} ({match['serving']}): {match['calories']:.0f} kcal"
+        st.button(label, key=f"food_match_{index}", on_click=set_food_prefill, args=(match,))
+
+
+def show_gap_suggestions(daily_totals):
+    """Suggest foods that close the gap to today's targets, each loggable with one tap"""
+    suggestion = suggest_meal(
+        get_profile(),
+        daily_totals,
+        st.session_state.data_manager.get_dietary_preferences()
+    )
+    with st.expander("🎯 Suggested foods to hit today's targets"):
+        if not suggestion['items']:
+            st.write("You're on target for today, or nothing in the catalog fits your preferences.")
+            return
+        for index, item in enumerate(suggestion['items']):
+            col1, col2 = st.columns([4, 1])
+            col1.write(
+                f"**{item['food']}** × {item['servings']:g}: {item['calories']:.0f} kcal, "
+                f"{item['protein']:.0f}g protein, {item['carbs']:.0f}g carbs, {item['fats']:.0f}g fats"
+            )
+            if col2.button("Log", key=f"log_suggestion_{index}"):
+                st.session_state.data_manager.add_food_entry(
+                    f"{item['food']} ({item['servings']:g} serving)",
+                    item['calories'], item['protein'], item['carbs'], item['fats']
+                )
+                st.rerun()
+        after = suggestion['remaining_after']
+        st.caption(
+            f"Left after these: {after['calories']:.0f} kcal, {after['protein']:.0f}g protein, "
+            f"{after['carbs']:.0f}g carbs, {after['fats']:.0f}g fats"
+        )
+
+
 def show_workout_page():
     st.header("Workout Recommendations")
 
-    if not st.session_state.profile:
+    profile = get_profile()
+    if not profile_complete(profile):
         st.warning("Please complete your profile first!")
         return
 
@@ -290,23 +457,22 @@ def show_workout_page():
     st.subheader("AI Workout Plan")
     if st.button("Get AI Workout Suggestions"):
         with st.spinner("Generating personalized workout recommendations..."):
-            recommendations = get_workout_recommendations(
-                st.session_state.profile['age'],
-                st.session_state.profile['fitness_level'],
-                st.session_state.profile['goal'],
-                st.session_state.profile.get('medical_conditions')
+            workout_args = workout_profile_args(profile)
+            show_streamed_recommendations(
+                stream_workout_recommendations(*workout_args),
+                WORKOUT_SECTIONS,
+                instant=local_workout_recommendations(*workout_args)
             )
-            show_workout_recommendations(recommendations)
 
     # Basic workout suggestions
     st.subheader("Basic Workout Plan")
     workouts = get_workout_recommendation(
-        st.session_state.profile['goal'],
-        st.session_state.profile['fitness_level']
+        profile['goal'],
+        profile['fitness_level']
     )
 
     # Display workout schedule
-    days = ["Monday", "Wednesday", "Friday"] if st.session_state.profile['fitness_level'] == "Beginner" else \
+    days = ["Monday", "Wednesday", "Friday"] if profile['fitness_level'] == "Beginner" else \
            ["Monday", "Tuesday", "Thursday", "Friday", "Saturday"]
 
     for day, workout in zip(days, workouts):
@@ -346,6 +512,16 @@ def show_workout_page():
 
 def show_progress_page():
     st.header("Progress Tracking")
+    show_weight_tracking()
+
+
+@st.fragment
+def show_weight_tracking():
+    """Weight form and chart; logging a weight or changing the range reruns only this fragment"""
+    # Plotting libraries take about a second to import, so they load with the first chart
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
 
     try:
         # Weight tracking
@@ -355,76 +531,166 @@ def show_progress_page():
                 st.session_state.data_manager.add_weight_entry(weight)
                 st.success("Weight logged successfully!")
 
-        # Weight progress chart
-        weight_history = st.session_state.data_manager.get_weight_history()
+        # Weight progress chart, windowed in SQL and downsampled before plotting
+        chart_range = st.radio(
+            "Range",
+            list(WEIGHT_CHART_RANGES),
+            index=len(WEIGHT_CHART_RANGES) - 1,
+            horizontal=True,
+            key="weight_chart_range"
+        )
+        days = WEIGHT_CHART_RANGES[chart_range]
+        start_date = datetime.now().date() - timedelta(days=days) if days else None
+        weight_history = st.session_state.data_manager.get_weight_history(start_date=start_date)
         if weight_history:
-            df = pd.DataFrame(weight_history)
+            mode, points = downsample_weight_history(weight_history, MAX_WEIGHT_CHART_POINTS)
+            df = pd.DataFrame(points)
             fig = px.line(
                 df,
                 x='date',
                 y='weight',
-                title='Weight Progress'
+                title='Weight Progress' if mode in ("raw", "lttb") else f'Weight Progress ({mode} average)',
+                render_mode='webgl' if len(df) > WEBGL_POINT_THRESHOLD else 'svg'
             )
+            if mode in ("weekly", "monthly"):
+                fig.add_trace(go.Scatter(
+                    x=list(df['date']) + list(df['date'][::-1]),
+                    y=list(df['max']) + list(df['min'][::-1]),
+                    fill='toself',
+                    fillcolor='rgba(144, 202, 249, 0.3)',
+                    line=dict(width=0),
+                    hoverinfo='skip',
+                    name='min-max range'
+                ))
             st.plotly_chart(fig)
+            if mode != "raw":
+                st.caption(f"Showing {len(df)} of {len(weight_history)} readings ({mode} downsampling)")
     except Exception as e:
         st.error(f"Error accessing progress tracking data: {str(e)}")
 
 
-def show_diet_recommendations(recommendations):
-    """Display enhanced diet recommendations"""
+def diet_profile_args(profile):
+    """Diet recommendation arguments taken from the profile"""
+    return (
+        profile['age'], profile['weight'], profile['height'],
+        profile['gender'], profile['activity_level'], profile['goal']
+    )
+
+
+def workout_profile_args(profile):
+    """Workout recommendation arguments taken from the profile"""
+    return profile['age'], profile['fitness_level'], profile['goal'], profile.get('medical_conditions')
+
+
+# (key, expander title, text shown when the section is missing) for each AI response
+DIET_SECTIONS = [
+    ('meal_plan', "📋 Meal Plan", 'No meal plan provided'),
+    ('foods_to_include', "🥗 Recommended Foods", 'No recommended foods provided'),
+    ('foods_to_avoid', "⛔ Foods to Avoid", 'No foods to avoid provided'),
+    ('timing_tips', "⏰ Meal Timing", 'No meal timing tips provided'),
+    ('supplements', "💊 Supplement Recommendations", 'No specific supplements recommended'),
+    ('meal_prep_tips', "🔪 Meal Prep Tips", 'No specific meal prep tips provided'),
+    ('dining_out_tips', "🍽️ Dining Out Guide", 'No specific dining out tips provided'),
+    ('hydration', "💧 Hydration Guide", 'No specific hydration recommendations provided'),
+]
+
+WORKOUT_SECTIONS = [
+    ('weekly_schedule', "📅 Weekly Schedule", 'No weekly schedule provided'),
+    ('exercise_details', "💪 Exercise Details", 'No exercise details provided'),
+    ('progression_plan', "📈 8-Week Progression", 'No progression plan provided'),
+    ('recovery_tips', "🧘‍♂️ Recovery & Mobility", 'No recovery tips provided'),
+    ('warmup_cooldown', "🔥 Warm-up & Cool-down", 'No warm-up/cool-down routine provided'),
+    ('tracking_metrics', "📊 Progress Tracking", 'No tracking metrics provided'),
+    ('alternative_exercises', "🔄 Alternative Exercises", 'No alternative exercises provided'),
+    ('injury_prevention', "🏥 Injury Prevention", 'No injury prevention tips provided'),
+    ('rest_guidelines', "⏱️ Rest Guidelines", 'No rest guidelines provided'),
+    ('cardio_integration', "🏃‍♂️ Cardio Integration", 'No cardio integration plan provided'),
+]
+
+DIET_PLAN_SECTIONS = [
+    ('weekly_meal_plan', "📅 Weekly Meal Plan", 'No weekly meal plan provided'),
+    ('shopping_list', "🛒 Shopping List", 'No shopping list provided'),
+    ('meal_prep_guide', "👩‍🍳 Meal Prep Guide", 'No meal prep guide provided'),
+    ('alternatives', "🔄 Alternative Meals", 'No alternative meals provided'),
+    ('restaurant_guide', "🍽️ Restaurant Guide", 'No restaurant guide provided'),
+    ('supplements', "💊 Supplement Guide", 'No supplement guide provided'),
+    ('hydration_schedule', "💧 Hydration Schedule", 'No hydration schedule provided'),
+    ('special_occasions', "🎉 Special Occasions", 'No special occasion tips provided'),
+    ('tracking_metrics', "📊 Progress Tracking", 'No progress tracking metrics provided'),
+    ('common_mistakes', "⚠️ Common Mistakes", 'No common mistakes provided'),
+]
+
+
+def show_recommendation_sections(recommendations, sections):
+    """Display a complete AI response as one expander per section"""
     if isinstance(recommendations, str):
         recommendations = json.loads(recommendations)
 
-    if 'error' not in recommendations:
-        with st.expander("📋 Meal Plan", expanded=True):
-            st.write(recommendations['meal_plan'])
-        with st.expander("🥗 Recommended Foods"):
-            st.write(recommendations['foods_to_include'])
-        with st.expander("⛔ Foods to Avoid"):
-            st.write(recommendations['foods_to_avoid'])
-        with st.expander("⏰ Meal Timing"):
-            st.write(recommendations['timing_tips'])
-        with st.expander("💊 Supplement Recommendations"):
-            st.write(recommendations.get('supplements', 'No specific supplements recommended'))
-        with st.expander("🔪 Meal Prep Tips"):
-            st.write(recommendations.get('meal_prep_tips', 'No specific meal prep tips provided'))
-        with st.expander("🍽️ Dining Out Guide"):
-            st.write(recommendations.get('dining_out_tips', 'No specific dining out tips provided'))
-        with st.expander("💧 Hydration Guide"):
-            st.write(recommendations.get('hydration', 'No specific hydration recommendations provided'))
-    else:
+    if 'error' in recommendations:
         st.error(recommendations['message'])
+        return
+    for index, (key, title, default) in enumerate(sections):
+        with st.expander(title, expanded=index == 0):
+            st.write(recommendations.get(key, default))
+
+
+def show_streamed_recommendations(stream, sections, instant=None):
+    """Fill in one expander per section as the streamed AI response produces it
+
+    With `instant` (a rule-based response with the same keys), every section
+    starts out showing the instant version and is replaced as the AI one arrives.
+    """
+    instant = json.loads(instant) if isinstance(instant, str) else (instant or {})
+    placeholders = {}
+    for index, (key, title, _) in enumerate(sections):
+        placeholders[key] = st.empty()
+        if key in instant:
+            with placeholders[key].container():
+                with st.expander(f"{title} (instant)", expanded=index == 0):
+                    st.write(instant[key])
+        else:
+            placeholders[key].caption(f"⏳ {title}")
+    if instant:
+        status = st.empty()
+        status.caption("⚡ Showing an instant plan from built-in rules; sections update as AI results arrive.")
+
+    received = set()
+    for key, value in stream:
+        if key == 'error':
+            if instant:
+                status.warning(f"AI recommendations unavailable, keeping the instant plan: {value['message']}")
+            else:
+                st.error(value['message'])
+            return
+        if key == 'unparsed':
+            st.warning("Part of the response could not be parsed; showing it as plain text.")
+            st.text(value)
+            continue
+        if key not in placeholders or key in received:
+            continue
+        received.add(key)
+        index, title = next((i, t) for i, (k, t, _) in enumerate(sections) if k == key)
+        with placeholders[key].container():
+            with st.expander(title, expanded=index == 0):
+                st.write(value)
+
+    if instant:
+        status.empty()
+    for key, title, default in sections:
+        if key not in received and key not in instant:
+            with placeholders[key].container():
+                with st.expander(title):
+                    st.write(default)
 
 
-def show_workout_recommendations(recommendations):
-    """Display enhanced workout recommendations"""
-    if isinstance(recommendations, str):
-        recommendations = json.loads(recommendations)
+def show_diet_recommendations(recommendations):
+    """Display enhanced diet recommendations"""
+    show_recommendation_sections(recommendations, DIET_SECTIONS)
 
-    if 'error' not in recommendations:
-        with st.expander("📅 Weekly Schedule", expanded=True):
-            st.write(recommendations['weekly_schedule'])
-        with st.expander("💪 Exercise Details"):
-            st.write(recommendations['exercise_details'])
-        with st.expander("📈 8-Week Progression"):
-            st.write(recommendations.get('progression_plan', 'No progression plan provided'))
-        with st.expander("🧘‍♂️ Recovery & Mobility"):
-            st.write(recommendations['recovery_tips'])
-        with st.expander("🔥 Warm-up & Cool-down"):
-            st.write(recommendations.get('warmup_cooldown', 'No warm-up/cool-down routine provided'))
-        with st.expander("📊 Progress Tracking"):
-            st.write(recommendations.get('tracking_metrics', 'No tracking metrics provided'))
-        with st.expander("🔄 Alternative Exercises"):
-            st.write(recommendations.get('alternative_exercises', 'No alternative exercises provided'))
-        with st.expander("🏥 Injury Prevention"):
-            st.write(recommendations.get('injury_prevention', 'No injury prevention tips provided'))
-        with st.expander("⏱️ Rest Guidelines"):
-            st.write(recommendations.get('rest_guidelines', 'No rest guidelines provided'))
-        with st.expander("🏃‍♂️ Cardio Integration"):
-            st.write(recommendations.get('cardio_integration', 'No cardio integration plan provided'))
-    else:
-        st.error(recommendations['message'])
 
+def show_workout_recommendations(recommendations):
+    """Display enhanced workout recommendations"""
+    show_recommendation_sections(recommendations, WORKOUT_SECTIONS)
 
 
 def show_diet_preferences_section():
@@ -511,11 +777,13 @@ def show_diet_preferences_section():
             st.success("Dietary preferences saved successfully!")
 
 
+@st.fragment
 def show_advanced_diet_recommendations():
     """Display advanced AI-powered diet recommendations"""
     st.subheader("Advanced Diet Recommendations")
 
-    if not st.session_state.profile:
+    profile = get_profile()
+    if not profile_complete(profile):
         st.warning("Please complete your profile first!")
         return
 
@@ -525,71 +793,73 @@ def show_advanced_diet_recommendations():
         st.markdown("[Go to Dietary Preferences](#dietary-preferences)")
         return
 
+    # Generation runs as a background job so reruns and page switches don't lose it
     if st.button("Generate Personalized Diet Plan"):
-        with st.spinner("Generating your personalized diet plan..."):
-            recommendations = get_personalized_diet_plan(
-                st.session_state.profile,
-                dietary_prefs
-            )
-
-            if isinstance(recommendations, str):
-                recommendations = json.loads(recommendations)
-
-            if 'error' not in recommendations:
-                with st.expander("📅 Weekly Meal Plan", expanded=True):
-                    st.write(recommendations['weekly_meal_plan'])
-
-                with st.expander("🛒 Shopping List"):
-                    st.write(recommendations['shopping_list'])
-
-                with st.expander("👩‍🍳 Meal Prep Guide"):
-                    st.write(recommendations['meal_prep_guide'])
+        st.session_state.plan_job_id = get_job_executor().submit(
+            "personalized_diet_plan",
+            {
+                'profile': {key: profile[key] for key in PLAN_PROFILE_FIELDS},
+                'dietary_preferences': dietary_prefs
+            }
+        )
 
-                with st.expander("🔄 Alternative Meals"):
-                    st.write(recommendations['alternatives'])
+    if st.session_state.get('plan_job_id'):
+        show_plan_job(st.session_state.plan_job_id, profile, dietary_prefs)
 
-                with st.expander("🍽️ Restaurant Guide"):
-                    st.write(recommendations['restaurant_guide'])
 
-                with st.expander("💊 Supplement Guide"):
-                    st.write(recommendations['supplements'])
+def show_plan_job(job_id, profile=None, dietary_prefs=None):
+    """Show a personalized plan job's result, or its progress and an instant plan while it runs"""
+    job = get_job_executor().get(job_id)
+    if job is None:
+        return
+    if job['status'] == SUCCEEDED:
+        show_personalized_diet_plan(job['result'])
+    elif job['status'] == FAILED:
+        st.error(job['error'])
+    elif job['status'] == CANCELLED:
+        st.info("Diet plan generation was cancelled.")
+    else:
+        poll_plan_job(job_id)
+        if profile and profile_complete(profile) and dietary_prefs:
+            st.caption("⚡ Instant plan from built-in rules, shown until the AI plan is ready:")
+            show_personalized_diet_plan(local_personalized_diet_plan(profile, dietary_prefs))
 
-                with st.expander("💧 Hydration Schedule"):
-                    st.write(recommendations['hydration_schedule'])
 
-                with st.expander("🎉 Special Occasions"):
-                    st.write(recommendations['special_occasions'])
+@st.fragment(run_every=2)
+def poll_plan_job(job_id):
+    """Poll an unfinished job without rerunning the page, then rerun once it finishes"""
+    job = get_job_executor().get(job_id)
+    if job is None or job['status'] in FINISHED_STATUSES:
+        st.rerun()
+    st.info("⏳ Generating your personalized diet plan in the background. "
+            "You can keep using the app; the plan will appear here when ready.")
+    if st.button("Cancel", key="cancel_plan_job"):
+        get_job_executor().cancel(job_id)
+        st.rerun()
 
-                with st.expander("📊 Progress Tracking"):
-                    st.write(recommendations['tracking_metrics'])
 
-                with st.expander("⚠️ Common Mistakes"):
-                    st.write(recommendations['common_mistakes'])
-            else:
-                st.error(recommendations['message'])
+def show_personalized_diet_plan(recommendations):
+    """Display a personalized weekly diet plan"""
+    show_recommendation_sections(recommendations, DIET_PLAN_SECTIONS)
 
 
-def download_user_data():
-    """Create downloadable files for user data"""
+def download_user_data(file_format='ndjson', compress=False):
+    """Build the complete user history export and return it as bytes for download"""
     try:
-        # Get user data
-        profile = st.session_state.profile
-        dietary_prefs = st.session_state.data_manager.get_dietary_preferences()
-        weight_history = st.session_state.data_manager.get_weight_history()
-        food_log = st.session_state.data_manager.get_todays_food_log()
-
-        # Create a dictionary with all user data
-        user_data = {
-            "profile": profile,
-            "dietary_preferences": dietary_prefs,
-            "weight_history": weight_history,
-            "food_log": food_log
-        }
-
-        # Convert to JSON string
-        json_str = json.dumps(user_data, indent=2, default=str)
-
-        return json_str
+        # Streamlit 1.43 has no streaming download: st.download_button reads its
+        # data into memory and keeps it in the media file manager, so the whole
+        # export is held in server memory either way. The temp file only keeps the
+        # export's intermediate chunks off the heap; data_export.py streams instead.
+        with tempfile.TemporaryFile() as export:
+            write_export(
+                export,
+                st.session_state.data_manager,
+                file_format,
+                profile=get_profile(),
+                compress=compress
+            )
+            export.seek(0)
+            return export.read()
     except Exception as e:
         st.error(f"Error preparing download data: {str(e)}")
         return None
@@ -598,41 +868,54 @@ def show_ai_recommendations_page():
     """Display all AI-powered features in one place"""
     st.header("AI-Powered Recommendations")
 
-    if not st.session_state.profile:
+    profile = get_profile()
+    if not profile_complete(profile):
         st.warning("Please complete your profile first to get personalized recommendations!")
         return
 
+    # Request every plan at once; total wait is the slowest plan rather than the sum
+    if st.button("Generate All Plans", key="all_ai"):
+        with st.spinner("Generating your diet, workout and personalized plans..."):
+            st.session_state.all_recommendations = get_all_recommendations(
+                profile,
+                st.session_state.data_manager.get_dietary_preferences()
+            )
+    all_recommendations = st.session_state.get('all_recommendations', {})
+
     # Create tabs for different AI features
     diet_tab, workout_tab = st.tabs(["🍽️ Diet Recommendations", "💪 Workout Recommendations"])
 
     with diet_tab:
         st.subheader("Personalized Diet Plan")
+        if 'diet' in all_recommendations:
+            show_diet_recommendations(all_recommendations['diet'])
+        if 'personalized_diet_plan' in all_recommendations:
+            st.subheader("Personalized Weekly Plan")
+            show_personalized_diet_plan(all_recommendations['personalized_diet_plan'])
         if st.button("Generate Diet Recommendations", key="diet_ai"):
+            diet_args = diet_profile_args(profile)
             with st.spinner("Analyzing your profile and generating personalized diet recommendations..."):
-                recommendations = get_diet_recommendations(
-                    st.session_state.profile['age'],
-                    st.session_state.profile['weight'],
-                    st.session_state.profile['height'],
-                    st.session_state.profile['gender'],
-                    st.session_state.profile['activity_level'],
-                    st.session_state.profile['goal']
+                show_streamed_recommendations(
+                    stream_diet_recommendations(*diet_args),
+                    DIET_SECTIONS,
+                    instant=local_diet_recommendations(*diet_args)
                 )
-                show_diet_recommendations(recommendations)
 
         st.markdown("---")
         show_advanced_diet_recommendations()
 
     with workout_tab:
         st.subheader("Personalized Workout Plan")
+        if 'workout' in all_recommendations:
+            show_workout_recommendations(all_recommendations['workout'])
         if st.button("Generate Workout Recommendations", key="workout_ai"):
             with st.spinner("Creating your personalized workout plan..."):
-                recommendations = get_workout_recommendations(
-                    st.session_state.profile['age'],
-                    st.session_state.profile['fitness_level'],
-                    st.session_state.profile['goal'],
-                    st.session_state.profile.get('medical_conditions')
+                workout_args = workout_profile_args(profile)
+                show_streamed_recommendations(
+                    stream_workout_recommendations(*workout_args),
+                    WORKOUT_SECTIONS,
+                    instant=local_workout_recommendations(*workout_args)
                 )
-                show_workout_recommendations(recommendations)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""Time the server-side work behind Food Tracking and Progress page interactions
+
+Before fragments, every interaction reran the whole app: page config, CSS,
+navigation and every section of the page. Now an interaction inside a
+fragment reruns only that fragment's function. This compares the two with
+Streamlit's AppTest harness on a temporary, seeded SQLite database; the
+cost of an empty script run is subtracted from both.
+
+Usage: python benchmarks/app_rerun_benchmark.py [runs]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+
+from streamlit.testing.v1 import AppTest
+from data_manager import DataManager
+
+PROFILE = {
+    'first_name': "Benchmark", 'age': 30, 'weight': 75.0, 'height': 178.0, 'gender': "Male",
+    'activity_level': "Moderately Active", 'goal': "Maintenance", 'fitness_level': "Intermediate"
+}
+
+# (page, interaction, fragment function that now reruns alone)
+INTERACTIONS = [
+    ("Food Tracking", "search the catalog / pick a match", "show_food_entry_form"),
+    ("Food Tracking", "open or cancel a log entry edit", "show_food_log"),
+    ("Food Tracking", "generate a personalized plan", "show_advanced_diet_recommendations"),
+    ("Progress", "log a weight / change the chart range", "show_weight_tracking"),
+]
+
+def seed(data_manager):
+    data_manager.save_profile(PROFILE)
+    data_manager.add_food_entries([
+        {'food': f"Meal {index % 6}", 'calories': 300 + index * 10, 'protein': 20, 'carbs': 35, 'fats': 10}
+        for index in range(12)
+    ])
+    for day in range(730):
+        data_manager.add_weight_entry(80 - day * 0.005)
+    data_manager.save_dietary_preferences({'allergies': ["Peanuts"], 'restrictions': [], 'preferred_cuisines': [],
+                                           'disliked_ingredients': [], 'meal_timing_preferences': {}})
+
+def _fragment_script(name, root):
+    import sys
+    sys.path.insert(0, root)
+    import app
+    getattr(app, name)()
+
+def _empty_script():
+    pass
+
+def median_run(app_test, runs):
+    app_test.run()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        app_test.run()
+        timings.append(time.perf_counter() - started)
+        if app_test.exception:
+            raise RuntimeError(app_test.exception[0].message)
+    return float(np.median(timings))
+
+def new_app_test(app_test, data_manager):
+    app_test.session_state['data_manager'] = data_manager
+    app_test.session_state['edit_index'] = None
+    return app_test
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    data_manager = DataManager()
+    seed(data_manager)
+
+    baseline = median_run(AppTest.from_function(_empty_script), runs)
+    full_app = {}
+    for page in sorted({page for page, _, _ in INTERACTIONS}):
+        app_test = new_app_test(AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60), data_manager)
+        app_test.run()
+        app_test.sidebar.radio(key="nav").set_value(page)
+        full_app[page] = median_run(app_test, runs) - baseline
+
+    print(f"{'page':<14}  {'interaction':<38}  {'full app':>9}  {'fragment':>9}  {'speedup':>7}")
+    for page, interaction, function in INTERACTIONS:
+        app_test = new_app_test(
+            AppTest.from_function(_fragment_script, args=(function, ROOT), default_timeout=60), data_manager
+        )
+        fragment = median_run(app_test, runs) - baseline
+        print(f"{page:<14}  {interaction:<38}  {full_app[page] * 1000:>7.1f}ms  {fragment * 1000:>7.1f}ms  "
+              f"{full_app[page] / max(fragment, 1e-6):>6.1f}x")
@@ -0,0 +1,74 @@
+"""Time meal suggestions from meal_optimizer.py on synthetic catalogs of growing size
+
+Usage: python benchmarks/meal_optimizer_benchmark.py [max_foods]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_optimizer import MealLibraryCatalog, optimize_meal
+
+TAGS = ["dairy", "eggs", "tree nuts", "peanuts", "shellfish", "wheat", "soy", "fish",
+        "meat", "pork", "gluten", "grains", "legumes", "honey"]
+WORDS = ["chicken", "beef", "tofu", "rice", "oats", "salmon", "lentil", "bean", "cheese", "yogurt",
+         "pasta", "potato", "spinach", "apple", "banana", "almond", "egg", "bread", "soup", "salad"]
+
+PREFERENCES = [
+    {},
+    {'allergies': ["Peanuts", "Shellfish"]},
+    {'restrictions': ["Vegetarian"], 'disliked_ingredients': ["mushroom", "olive"]},
+    {'allergies': ["Dairy"], 'restrictions': ["Vegan", "Gluten-Free"], 'disliked_ingredients': ["tofu"]},
+    {'restrictions': ["Keto"]},
+]
+
+def make_catalog(foods, seed=0):
+    rng = np.random.default_rng(seed)
+    protein = rng.uniform(0, 50, foods)
+    carbs = rng.uniform(0, 80, foods)
+    fats = rng.uniform(0, 30, foods)
+    words = rng.choice(WORDS, (foods, 3))
+    tags = [list(rng.choice(TAGS, rng.integers(0, 4), replace=False)) for _ in range(foods)]
+    return MealLibraryCatalog(
+        [f"{' '.join(row)} #{index}" for index, row in enumerate(words)],
+        protein * 4 + carbs * 4 + fats * 9, protein, carbs, fats, tags=tags
+    )
+
+def make_gaps(count, seed=1):
+    rng = np.random.default_rng(seed)
+    return [{
+        'calories': float(rng.uniform(200, 1500)),
+        'protein': float(rng.uniform(10, 120)),
+        'carbs': float(rng.uniform(10, 150)),
+        'fats': float(rng.uniform(5, 60))
+    } for _ in range(count)]
+
+def run(foods, gaps):
+    started = time.perf_counter()
+    catalog = make_catalog(foods)
+    build = time.perf_counter() - started
+
+    cold = []
+    for preferences in PREFERENCES:
+        started = time.perf_counter()
+        optimize_meal(catalog, gaps[0], preferences)
+        cold.append(time.perf_counter() - started)
+
+    warm = []
+    for index, gap in enumerate(gaps):
+        started = time.perf_counter()
+        optimize_meal(catalog, gap, PREFERENCES[index % len(PREFERENCES)])
+        warm.append(time.perf_counter() - started)
+    return build, max(cold), np.median(warm), np.percentile(warm, 95)
+
+if __name__ == "__main__":
+    max_foods = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    gaps = make_gaps(200)
+    print(f"{'foods':>9}  {'build':>9}  {'cold max':>9}  {'warm p50':>9}  {'warm p95':>9}")
+    foods = 1_000
+    while foods <= max_foods:
+        build, cold, p50, p95 = run(foods, gaps)
+        print(f"{foods:>9,}  {build * 1000:>7.1f}ms  {cold * 1000:>7.2f}ms  {p50 * 1000:>7.2f}ms  {p95 * 1000:>7.2f}ms")
+        foods *= 10
@@ -0,0 +1,97 @@
+"""Report app.py's cold import time with a per-package breakdown, and check it against a budget
+
+Each run imports app in a fresh interpreter under `python -X importtime`.
+The script exits with status 1 when the median import time is over the
+budget, or when a dependency that should load on first use (openai, pandas,
+plotly.express, ...) is imported at startup, so CI can run it as a
+regression check.
+
+Usage: python benchmarks/startup_benchmark.py [--runs 5] [--budget-ms 1500] [--top 15]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies only some pages or features need; importing app must not load them.
+# (plotly.graph_objects is left out: Streamlit itself imports its lazy-loading stub.)
+DEFERRED_MODULES = ("openai", "httpx", "pandas", "plotly.express")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+CHILD = """
+import sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(elapsed)
+print(",".join(name for name in sys.argv[1:] if name in sys.modules))
+"""
+
+def import_app(env):
+    """Import app in a fresh interpreter; returns (seconds, cumulative us per direct import, deferred modules loaded)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *DEFERRED_MODULES],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app failed:\n{result.stderr[-2000:]}")
+    lines = result.stdout.splitlines()
+    # Children are listed before their parent, so the depth-1 entries just before "app" are its imports
+    cumulative = {}
+    children = {}
+    for match in IMPORT_LINE.finditer(result.stderr):
+        depth = len(match.group(3)) // 2
+        if depth == 0:
+            if match.group(4) == "app":
+                cumulative = dict(children, **{'app (own code)': int(match.group(1))})
+            children = {}
+        elif depth == 1:
+            package = match.group(4).split(".")[0]
+            children[package] = children.get(package, 0) + int(match.group(2))
+    return float(lines[-2]), cumulative, [name for name in lines[-1].split(",") if name]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('APP_IMPORT_BUDGET_MS', 1500)))
+    parser.add_argument('--top', type=int, default=15, help="packages to list in the breakdown")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    env.pop('OPENAI_API_KEY', None)
+
+    # The first run compiles bytecode and migrates the database; it is not counted
+    import_app(env)
+    timings = []
+    breakdown = {}
+    loaded = set()
+    for _ in range(args.runs):
+        seconds, cumulative, deferred = import_app(env)
+        timings.append(seconds)
+        loaded.update(deferred)
+        for package, micros in cumulative.items():
+            breakdown.setdefault(package, []).append(micros)
+
+    median = statistics.median(timings) * 1000
+    print(f"Cold import of app: median {median:.0f}ms, min {min(timings) * 1000:.0f}ms, "
+          f"max {max(timings) * 1000:.0f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    print(f"\nImported by app{'':<13}  {'cumulative':>10}")
+    ranked = sorted(breakdown.items(), key=lambda item: -statistics.median(item[1]))
+    for package, micros in ranked[:args.top]:
+        print(f"{package:<28}  {statistics.median(micros) / 1000:>8.1f}ms")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median cold import {median:.0f}ms is over the {args.budget_ms:.0f}ms budget")
+    if loaded:
+        failures.append(f"imported at startup but should load on first use: {', '.join(sorted(loaded))}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,57 @@
+"""Compare the scalar and vectorized daily-target paths in utils.py
+
+Usage: python benchmarks/targets_benchmark.py [rows]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (
+    calculate_bmr, calculate_tdee, get_macro_split, calculate_daily_targets,
+    ACTIVITY_MULTIPLIERS, MACRO_SPLITS
+)
+
+def make_roster(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'weight': rng.uniform(45, 150, rows),
+        'height': rng.uniform(150, 200, rows),
+        'age': rng.integers(15, 90, rows),
+        'gender': rng.choice(["Male", "Female"], rows),
+        'activity_level': rng.choice(list(ACTIVITY_MULTIPLIERS), rows),
+        'goal': rng.choice(list(MACRO_SPLITS), rows)
+    }
+
+def scalar_targets(roster):
+    calories = []
+    protein = []
+    for weight, height, age, gender, activity, goal in zip(
+        roster['weight'], roster['height'], roster['age'],
+        roster['gender'], roster['activity_level'], roster['goal']
+    ):
+        tdee = calculate_tdee(calculate_bmr(weight, height, age, gender), activity)
+        calories.append(tdee)
+        protein.append(tdee * get_macro_split(goal)['protein'] / 4)
+    return np.array(calories), np.array(protein)
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    roster = make_roster(rows)
+
+    vectorized, vectorized_time = timed(calculate_daily_targets, **roster)
+    (calories, protein), scalar_time = timed(scalar_targets, roster)
+
+    assert np.allclose(calories, vectorized['calories'])
+    assert np.allclose(protein, vectorized['protein'])
+    print(f"rows:       {rows:,}")
+    print(f"scalar:     {scalar_time:.3f}s ({rows / scalar_time:,.0f} rows/sec)")
+    print(f"vectorized: {vectorized_time:.3f}s ({rows / vectorized_time:,.0f} rows/sec)")
+    print(f"speedup:    {scalar_time / vectorized_time:.1f}x")
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+CSV_COLUMNS = ['type', 'date', 'food', 'calories', 'protein', 'carbs', 'fats', 'weight']
+DEFAULT_BATCH_SIZE = 1000
+
+def _ndjson_line(record):
+    return json.dumps(record, default=str) + '\n'
+
+def iter_ndjson_export(data_manager, profile=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the full user history as NDJSON text chunks
+
+    The profile and dietary preferences come first, followed by every food and
+    weight entry. Each chunk holds at most batch_size records.
+    """
+    if profile is not None:
+        public_profile = {key: value for key, value in profile.items() if key != 'photo'}
+        yield _ndjson_line({'type': 'profile', **public_profile})
+    yield _ndjson_line({'type': 'dietary_preferences', **data_manager.get_dietary_preferences()})
+
+    lines = []
+    for date, food, calories, protein, carbs, fats, _ in data_manager.iter_food_history(batch_size):
+        lines.append(_ndjson_line({
+            'type': 'food', 'date': date, 'food': food,
+            'calories': calories, 'protein': protein, 'carbs': carbs, 'fats': fats
+        }))
+        if len(lines) >= batch_size:
+            yield ''.join(lines)
+            lines = []
+    for date, weight in data_manager.iter_weight_history(batch_size):
+        lines.append(_ndjson_line({'type': 'weight', 'date': date, 'weight': weight}))
+        if len(lines) >= batch_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+def iter_csv_export(data_manager, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the full food and weight history as CSV text chunks with a shared header
+
+    The profile and dietary preferences are nested records that do not fit the
+    tabular columns, so unlike the NDJSON export the CSV leaves them out.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+
+    def drain():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    rows = 0
+    for date, food, calories, protein, carbs, fats, _ in data_manager.iter_food_history(batch_size):
+        writer.writerow(['food', date, food, calories, protein, carbs, fats, ''])
+        rows += 1
+        if rows % batch_size == 0:
+            yield drain()
+    for date, weight in data_manager.iter_weight_history(batch_size):
+        writer.writerow(['weight', date, '', '', '', '', '', weight])
+        rows += 1
+        if rows % batch_size == 0:
+            yield drain()
+    remainder = drain()
+    if remainder:
+        yield remainder
+
+def iter_export(data_manager, file_format='ndjson', profile=None, compress=False,
+                batch_size=DEFAULT_BATCH_SIZE):
+    """Yield an export as bytes chunks, optionally gzip-compressed on the fly"""
+    if file_format == 'csv':
+        chunks = iter_csv_export(data_manager, batch_size)
+    elif file_format == 'ndjson':
+        chunks = iter_ndjson_export(data_manager, profile, batch_size)
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    # wbits=31 selects the gzip container so the output opens with standard tools
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_file_name(file_format='ndjson', compress=False):
+    """Get the download file name for an export"""
+    extension = 'csv' if file_format == 'csv' else 'ndjson'
+    return f"fitness_data.{extension}" + ('.gz' if compress else '')
+
+def write_export(stream, data_manager, file_format='ndjson', profile=None, compress=False,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """Write an export to a binary stream, returning the number of bytes written"""
+    written = 0
+    for data in iter_export(data_manager, file_format, profile, compress, batch_size):
+        stream.write(data)
+        written += len(data)
+    return written
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="Export the complete food and weight history")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+    parser.add_argument('--gzip', action='store_true', help="gzip-compress the output")
+    parser.add_argument('--output', help="output file (defaults to stdout)")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    profile = data_manager.get_profile() or None
+    if args.output:
+        with open(args.output, 'wb') as output:
+            write_export(output, data_manager, args.format, profile=profile, compress=args.gzip)
+    else:
+        write_export(sys.stdout.buffer, data_manager, args.format, profile=profile, compress=args.gzip)
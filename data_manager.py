@@ -1,13 +1,109 @@
+import functools
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, Float, String, Date, JSON
+from sqlalchemy import (
+    case, create_engine, event, insert, Column, Integer, Float, String, Text, Date, DateTime, JSON, Index,
+    LargeBinary
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from migrations import (
+    ensure_schema, food_frequency_key, food_frequency_last_used, rebuild_daily_summary, rebuild_food_frequency
+)
+from query_cache import get_query_cache
 
 Base = declarative_base()
 
+# One engine (and connection pool) per process, shared by every Streamlit session
+_engine = None
+_engine_lock = threading.Lock()
+_pool_metrics = {
+    'connects': 0,
+    'checkouts': 0,
+    'checkins': 0,
+    'queries': 0,
+    'wait_count': 0,
+    'wait_total': 0.0,
+    'wait_max': 0.0
+}
+_metrics_lock = threading.Lock()
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _count_pool_event(name):
+    with _metrics_lock:
+        _pool_metrics[name] += 1
+
+def _record_checkout_wait(seconds):
+    with _metrics_lock:
+        _pool_metrics['wait_count'] += 1
+        _pool_metrics['wait_total'] += seconds
+        _pool_metrics['wait_max'] = max(_pool_metrics['wait_max'], seconds)
+
+def get_engine():
+    """Get the process-wide SQLAlchemy engine, creating it on first use
+
+    Pool settings are read from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            database_url = os.environ.get('DATABASE_URL')
+            if not database_url:
+                raise ValueError("DATABASE_URL environment variable not set")
+
+            engine = create_engine(
+                database_url,
+                pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+                max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+                pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+                pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+                pool_pre_ping=_env_bool('DB_POOL_PRE_PING', True)
+            )
+            event.listen(engine, 'connect', lambda *args: _count_pool_event('connects'))
+            event.listen(engine, 'checkout', lambda *args: _count_pool_event('checkouts'))
+            event.listen(engine, 'checkin', lambda *args: _count_pool_event('checkins'))
+            event.listen(engine, 'before_cursor_execute', lambda *args: _count_pool_event('queries'))
+
+            ensure_schema(engine, Base.metadata)
+            _engine = engine
+    return _engine
+
+def get_pool_stats():
+    """Get connection pool usage, checkout wait and executed-statement metrics for pool sizing"""
+    engine = get_engine()
+    pool = engine.pool
+    with _metrics_lock:
+        stats = dict(_pool_metrics)
+    stats['wait_avg'] = stats['wait_total'] / stats['wait_count'] if stats['wait_count'] else 0.0
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+def dispose_engine():
+    """Close all pooled connections and drop the shared engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+
 class FoodEntry(Base):
     __tablename__ = 'food_log'
+    __table_args__ = (Index('ix_food_log_date_id', 'date', 'id'),)
 
     id = Column(Integer, primary_key=True)
     date = Column(Date, nullable=False)
@@ -19,6 +115,7 @@ class FoodEntry(Base):
 
 class WeightEntry(Base):
     __tablename__ = 'weight_log'
+    __table_args__ = (Index('ix_weight_log_date_id', 'date', 'id'),)
 
     id = Column(Integer, primary_key=True)
     date = Column(Date, nullable=False)
@@ -34,103 +131,579 @@ class DietaryPreferences(Base):
     disliked_ingredients = Column(JSON, nullable=True)
     meal_timing_preferences = Column(JSON, nullable=True)
 
+class Profile(Base):
+    """The user's profile, stored in the database so every server process and replica reads the same one"""
+    __tablename__ = 'profiles'
+
+    id = Column(String(32), primary_key=True)
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
+    ethnicity = Column(String, nullable=True)
+    age = Column(Integer, nullable=True)
+    height = Column(Float, nullable=True)
+    weight = Column(Float, nullable=True)
+    gender = Column(String, nullable=True)
+    activity_level = Column(String, nullable=True)
+    fitness_level = Column(String, nullable=True)
+    goal = Column(String, nullable=True)
+    medical_conditions = Column(Text, nullable=True)
+    photo = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+
+# The app keeps one user per database, so their profile is a single row under this key
+DEFAULT_PROFILE_ID = 'default'
+
+PROFILE_FIELDS = (
+    'first_name', 'last_name', 'ethnicity', 'age', 'height', 'weight', 'gender',
+    'activity_level', 'fitness_level', 'goal', 'medical_conditions', 'photo'
+)
+
+class DailyNutritionSummary(Base):
+    """Per-day rollup of food_log, maintained in the same transaction as each write"""
+    __tablename__ = 'daily_nutrition_summary'
+
+    date = Column(Date, primary_key=True)
+    calories = Column(Float, nullable=False, default=0.0)
+    protein = Column(Float, nullable=False, default=0.0)
+    carbs = Column(Float, nullable=False, default=0.0)
+    fats = Column(Float, nullable=False, default=0.0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+class FoodFrequency(Base):
+    """Quick-add index of logged foods by normalized name, maintained with each food_log write"""
+    __tablename__ = 'food_frequency'
+    __table_args__ = (
+        Index('ix_food_frequency_uses', 'uses', 'last_used'),
+        Index('ix_food_frequency_last_used', 'last_used'),
+    )
+
+    key = Column(String, primary_key=True)
+    food = Column(String, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=False)
+    carbs = Column(Float, nullable=False)
+    fats = Column(Float, nullable=False)
+    uses = Column(Integer, nullable=False, default=0)
+    last_used = Column(DateTime, nullable=False)
+
+class RecommendationCacheEntry(Base):
+    """Cached AI recommendation response, keyed by a hash of the normalized prompt inputs"""
+    __tablename__ = 'recommendation_cache'
+    __table_args__ = (Index('ix_recommendation_cache_last_accessed', 'last_accessed'),)
+
+    key = Column(String(64), primary_key=True)
+    kind = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    last_accessed = Column(DateTime, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    inputs = Column(JSON, nullable=True)
+
+class PregeneratedRecommendation(Base):
+    """Recommendation generated offline for one cell of the profile grid"""
+    __tablename__ = 'pregenerated_recommendations'
+
+    key = Column(String(64), primary_key=True)
+    kind = Column(String, nullable=False)
+    inputs = Column(JSON, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class RecommendationJob(Base):
+    """Background AI generation job with its persisted status and result"""
+    __tablename__ = 'recommendation_jobs'
+    __table_args__ = (Index('ix_recommendation_jobs_status_updated_at', 'status', 'updated_at'),)
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    params = Column(JSON, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+def _food_log_row(row):
+    """Convert a (food, calories, protein, carbs, fats, id) row tuple to a log dict"""
+    return {
+        'food': row[0],
+        'calories': row[1],
+        'protein': row[2],
+        'carbs': row[3],
+        'fats': row[4],
+        'id': row[5]
+    }
+
+def _totals_dict(row):
+    """Convert a (calories, protein, carbs, fats) sum row to a totals dict"""
+    return {
+        'calories': float(row[0] or 0.0),
+        'protein': float(row[1] or 0.0),
+        'carbs': float(row[2] or 0.0),
+        'fats': float(row[3] or 0.0)
+    }
+
+def _bump_daily_summary(session, day, calories, protein, carbs, fats, entries):
+    """Add deltas to a day's rollup row with an atomic upsert"""
+    values = {
+        'date': day,
+        'calories': calories,
+        'protein': protein,
+        'carbs': carbs,
+        'fats': fats,
+        'entry_count': entries
+    }
+    table = DailyNutritionSummary.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.date],
+            set_={name: table.c[name] + stmt.excluded[name] for name in values if name != 'date'}
+        )
+        session.execute(stmt)
+        return
+
+    summary = session.query(DailyNutritionSummary).filter(
+        DailyNutritionSummary.date == day
+    ).with_for_update().first()
+    if not summary:
+        session.add(DailyNutritionSummary(**values))
+        return
+    for name, delta in values.items():
+        if name != 'date':
+            setattr(summary, name, getattr(summary, name) + delta)
+
+def _food_frequency_rows(entries):
+    """Aggregate food entries into one quick-add row per normalized name"""
+    rows = {}
+    for entry in entries:
+        key = food_frequency_key(entry['food'])
+        if not key:
+            continue
+        last_used = food_frequency_last_used(entry['date'], datetime.now())
+        row = rows.get(key)
+        if row is None or last_used >= row['last_used']:
+            rows[key] = {
+                'key': key,
+                'food': " ".join(entry['food'].split()),
+                'calories': entry['calories'],
+                'protein': entry['protein'],
+                'carbs': entry['carbs'],
+                'fats': entry['fats'],
+                'uses': (row['uses'] if row else 0) + 1,
+                'last_used': last_used
+            }
+        else:
+            row['uses'] += 1
+    return list(rows.values())
+
+def _bump_food_frequency(session, rows):
+    """Count uses in the quick-add index with an atomic upsert per food
+
+    Name and macros follow the most recently dated entry, so logging an old
+    meal after the fact does not overwrite what was eaten today.
+    """
+    if not rows:
+        return
+    table = FoodFrequency.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table)
+        newer = stmt.excluded.last_used >= table.c.last_used
+        set_ = {
+            name: case((newer, stmt.excluded[name]), else_=table.c[name])
+            for name in ('food', 'calories', 'protein', 'carbs', 'fats', 'last_used')
+        }
+        set_['uses'] = table.c.uses + stmt.excluded.uses
+        session.execute(stmt.on_conflict_do_update(index_elements=[table.c.key], set_=set_), rows)
+        return
+
+    for row in rows:
+        frequency = session.query(FoodFrequency).filter(
+            FoodFrequency.key == row['key']
+        ).with_for_update().first()
+        if not frequency:
+            session.add(FoodFrequency(**row))
+            continue
+        frequency.uses += row['uses']
+        if row['last_used'] >= frequency.last_used:
+            for name in ('food', 'calories', 'protein', 'carbs', 'fats', 'last_used'):
+                setattr(frequency, name, row[name])
+
+def _release_food_frequency(session, food):
+    """Take one use of a food back out of the quick-add index, dropping it at zero"""
+    table = FoodFrequency.__table__
+    key = food_frequency_key(food)
+    session.execute(table.update().where(table.c.key == key).values(uses=table.c.uses - 1))
+    session.execute(table.delete().where(table.c.key == key, table.c.uses <= 0))
+
+def _quick_add_row(row):
+    """Convert a (food, calories, protein, carbs, fats, uses, last_used) row to a quick-add dict"""
+    return {
+        'food': row[0],
+        'calories': row[1],
+        'protein': row[2],
+        'carbs': row[3],
+        'fats': row[4],
+        'uses': row[5],
+        'last_used': row[6]
+    }
+
+def _cached_read(method):
+    """Serve a read method from the query cache until the next write to the same data"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # Today's date is part of the key so "today" reads roll over at midnight
+        key = (method.__name__, args, tuple(sorted(kwargs.items())), datetime.now().date())
+        return get_query_cache().get_or_load(self.cache_scope, key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+def _invalidates_reads(method):
+    """Invalidate cached reads once a write method has finished, committed or not"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            get_query_cache().bump(self.cache_scope)
+    return wrapper
+
 class DataManager:
     def __init__(self):
-        """Initialize DataManager with PostgreSQL connection"""
-        database_url = os.environ.get('DATABASE_URL')
-        if not database_url:
-            raise ValueError("DATABASE_URL environment variable not set")
-
-        self.engine = create_engine(database_url)
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
-
-    def add_food_entry(self, food, calories, protein, carbs, fats):
-        """Add a food entry to the food log"""
+        """Initialize DataManager on the shared PostgreSQL engine"""
+        self.engine = get_engine()
+        # All of a user's data lives in one database, so its URL scopes their cached reads
+        self.cache_scope = self.engine.url.render_as_string(hide_password=True)
+
+    @contextmanager
+    def session_scope(self):
+        """Provide a short unit-of-work session, rolled back on error and always closed
+
+        The session is bound to the current shared engine, so a DataManager created
+        before dispose_engine() keeps working on the engine that replaces it.
+        """
+        session = Session(bind=get_engine(), expire_on_commit=False)
+        try:
+            started = time.perf_counter()
+            session.connection()
+            _record_checkout_wait(time.perf_counter() - started)
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @_invalidates_reads
+    def add_food_entry(self, food, calories, protein, carbs, fats, date=None):
+        """Add a food entry to the food log (dated today unless a date is given)"""
         entry = FoodEntry(
-            date=datetime.now().date(),
+            date=date or datetime.now().date(),
             food=food,
             calories=float(calories),
             protein=float(protein),
             carbs=float(carbs),
             fats=float(fats)
         )
-        self.session.add(entry)
-        self.session.commit()
+        with self.session_scope() as session:
+            session.add(entry)
+            _bump_daily_summary(
+                session, entry.date,
+                entry.calories, entry.protein, entry.carbs, entry.fats, 1
+            )
+            _bump_food_frequency(session, _food_frequency_rows([{
+                'date': entry.date,
+                'food': entry.food,
+                'calories': entry.calories,
+                'protein': entry.protein,
+                'carbs': entry.carbs,
+                'fats': entry.fats
+            }]))
 
+    @_invalidates_reads
+    def add_food_entries(self, entries):
+        """Add many food entries in one transaction, returning the number inserted
+
+        Each entry is a dict with food, calories, protein, carbs, fats and an
+        optional date (defaults to today). Rows go in through a single executemany
+        and the daily rollup gets one upsert per distinct date (the quick-add
+        index one per distinct food).
+        """
+        today = datetime.now().date()
+        rows = [{
+            'date': entry.get('date') or today,
+            'food': entry['food'],
+            'calories': float(entry['calories']),
+            'protein': float(entry['protein']),
+            'carbs': float(entry['carbs']),
+            'fats': float(entry['fats'])
+        } for entry in entries]
+        if not rows:
+            return 0
+
+        per_day = {}
+        for row in rows:
+            totals = per_day.setdefault(row['date'], [0.0, 0.0, 0.0, 0.0, 0])
+            totals[0] += row['calories']
+            totals[1] += row['protein']
+            totals[2] += row['carbs']
+            totals[3] += row['fats']
+            totals[4] += 1
+
+        with self.session_scope() as session:
+            session.execute(insert(FoodEntry.__table__), rows)
+            for day, totals in sorted(per_day.items()):
+                _bump_daily_summary(session, day, *totals)
+            _bump_food_frequency(session, _food_frequency_rows(rows))
+        return len(rows)
+
+    @_invalidates_reads
     def update_food_entry(self, index, food, calories, protein, carbs, fats):
         """Update an existing food entry"""
-        entry = self.session.query(FoodEntry).filter(FoodEntry.id == index).first()
-        if entry:
-            entry.food = food
-            entry.calories = float(calories)
-            entry.protein = float(protein)
-            entry.carbs = float(carbs)
-            entry.fats = float(fats)
-            self.session.commit()
+        with self.session_scope() as session:
+            entry = session.query(FoodEntry).filter(FoodEntry.id == index).first()
+            if entry:
+                _bump_daily_summary(
+                    session, entry.date,
+                    float(calories) - entry.calories,
+                    float(protein) - entry.protein,
+                    float(carbs) - entry.carbs,
+                    float(fats) - entry.fats,
+                    0
+                )
+                _release_food_frequency(session, entry.food)
+                _bump_food_frequency(session, _food_frequency_rows([{
+                    'date': entry.date,
+                    'food': food,
+                    'calories': float(calories),
+                    'protein': float(protein),
+                    'carbs': float(carbs),
+                    'fats': float(fats)
+                }]))
+                entry.food = food
+                entry.calories = float(calories)
+                entry.protein = float(protein)
+                entry.carbs = float(carbs)
+                entry.fats = float(fats)
 
+    @_cached_read
     def get_todays_food_log(self):
         """Get today's food entries"""
         today = datetime.now().date()
-        entries = self.session.query(FoodEntry).filter(FoodEntry.date == today).all()
-        return [{
-            'food': entry.food,
-            'calories': entry.calories,
-            'protein': entry.protein,
-            'carbs': entry.carbs,
-            'fats': entry.fats,
-            'id': entry.id
-        } for entry in entries]
+        with self.session_scope() as session:
+            rows = session.query(
+                FoodEntry.food, FoodEntry.calories, FoodEntry.protein,
+                FoodEntry.carbs, FoodEntry.fats, FoodEntry.id
+            ).filter(FoodEntry.date == today).order_by(FoodEntry.id).all()
+            return [_food_log_row(row) for row in rows]
+
+    @_cached_read
+    def get_frequent_foods(self, limit=6):
+        """Get the most often logged foods with their latest macros, read off the quick-add index"""
+        with self.session_scope() as session:
+            rows = session.query(
+                FoodFrequency.food, FoodFrequency.calories, FoodFrequency.protein,
+                FoodFrequency.carbs, FoodFrequency.fats, FoodFrequency.uses, FoodFrequency.last_used
+            ).order_by(FoodFrequency.uses.desc(), FoodFrequency.last_used.desc()).limit(limit).all()
+            return [_quick_add_row(row) for row in rows]
+
+    @_cached_read
+    def get_recent_foods(self, limit=6):
+        """Get the most recently logged foods with their latest macros, read off the quick-add index"""
+        with self.session_scope() as session:
+            rows = session.query(
+                FoodFrequency.food, FoodFrequency.calories, FoodFrequency.protein,
+                FoodFrequency.carbs, FoodFrequency.fats, FoodFrequency.uses, FoodFrequency.last_used
+            ).order_by(FoodFrequency.last_used.desc()).limit(limit).all()
+            return [_quick_add_row(row) for row in rows]
 
+    def get_quick_add_foods(self, limit=8):
+        """Get up to `limit` foods for one-tap logging: the most frequent, then the most recent others"""
+        foods = self.get_frequent_foods((limit + 1) // 2)
+        seen = {food_frequency_key(food['food']) for food in foods}
+        for food in self.get_recent_foods(limit):
+            if len(foods) >= limit:
+                break
+            if food_frequency_key(food['food']) not in seen:
+                foods.append(food)
+                seen.add(food_frequency_key(food['food']))
+        return foods
+
+    @_invalidates_reads
+    def rebuild_food_frequency(self):
+        """Repair the quick-add index from food_log, returning the number of foods written"""
+        with self.session_scope() as session:
+            return rebuild_food_frequency(session.connection(), Base.metadata)
+
+    @_invalidates_reads
     def add_weight_entry(self, weight):
         """Add a weight entry to the weight log"""
         entry = WeightEntry(
             date=datetime.now().date(),
             weight=float(weight)
         )
-        self.session.add(entry)
-        self.session.commit()
+        with self.session_scope() as session:
+            session.add(entry)
 
+    @_cached_read
     def get_daily_totals(self):
         """Get total nutritional values for today"""
         today = datetime.now().date()
-        entries = self.session.query(FoodEntry).filter(FoodEntry.date == today).all()
+        with self.session_scope() as session:
+            row = session.query(
+                DailyNutritionSummary.calories, DailyNutritionSummary.protein,
+                DailyNutritionSummary.carbs, DailyNutritionSummary.fats
+            ).filter(DailyNutritionSummary.date == today).first()
+            return _totals_dict(row or (0.0, 0.0, 0.0, 0.0))
+
+    @_cached_read
+    def get_nutrition_history(self, start_date=None, end_date=None):
+        """Get per-day nutrition totals from the rollup, ordered by date"""
+        with self.session_scope() as session:
+            query = session.query(
+                DailyNutritionSummary.date, DailyNutritionSummary.calories,
+                DailyNutritionSummary.protein, DailyNutritionSummary.carbs,
+                DailyNutritionSummary.fats, DailyNutritionSummary.entry_count
+            )
+            if start_date is not None:
+                query = query.filter(DailyNutritionSummary.date >= start_date)
+            if end_date is not None:
+                query = query.filter(DailyNutritionSummary.date <= end_date)
+            return [{
+                'date': row[0],
+                **_totals_dict(row[1:5]),
+                'entries': row[5]
+            } for row in query.order_by(DailyNutritionSummary.date).all()]
+
+    @_invalidates_reads
+    def rebuild_daily_summary(self, start_date=None, end_date=None):
+        """Repair the daily rollup from food_log, returning the number of days written"""
+        with self.session_scope() as session:
+            return rebuild_daily_summary(session.connection(), Base.metadata, start_date, end_date)
+
+    @_cached_read
+    def get_today_snapshot(self):
+        """Get today's totals and food log together in one query
+
+        Each of today's food_log rows is joined to today's daily_nutrition_summary
+        row, so totals come from the rollup (the same source as get_daily_totals
+        and get_nutrition_history) without re-aggregating food_log or a second
+        round trip.
+        """
+        today = datetime.now().date()
+        with self.session_scope() as session:
+            rows = session.query(
+                FoodEntry.food, FoodEntry.calories, FoodEntry.protein,
+                FoodEntry.carbs, FoodEntry.fats, FoodEntry.id,
+                DailyNutritionSummary.calories, DailyNutritionSummary.protein,
+                DailyNutritionSummary.carbs, DailyNutritionSummary.fats
+            ).outerjoin(
+                DailyNutritionSummary, DailyNutritionSummary.date == FoodEntry.date
+            ).filter(FoodEntry.date == today).order_by(FoodEntry.id).all()
+
         return {
-            'calories': sum(entry.calories for entry in entries),
-            'protein': sum(entry.protein for entry in entries),
-            'carbs': sum(entry.carbs for entry in entries),
-            'fats': sum(entry.fats for entry in entries)
+            'totals': _totals_dict(rows[0][6:] if rows else (0.0, 0.0, 0.0, 0.0)),
+            'log': [_food_log_row(row[:6]) for row in rows]
         }
 
-    def get_weight_history(self):
-        """Get weight history for plotting"""
-        entries = self.session.query(WeightEntry).order_by(WeightEntry.date).all()
-        return [{
-            'date': entry.date,
-            'weight': entry.weight
-        } for entry in entries]
+    @_cached_read
+    def get_weight_history(self, start_date=None, end_date=None):
+        """Get weight history for plotting, optionally limited to a date range"""
+        with self.session_scope() as session:
+            query = session.query(WeightEntry.date, WeightEntry.weight)
+            if start_date is not None:
+                query = query.filter(WeightEntry.date >= start_date)
+            if end_date is not None:
+                query = query.filter(WeightEntry.date <= end_date)
+            return [{
+                'date': row[0],
+                'weight': row[1]
+            } for row in query.order_by(WeightEntry.date, WeightEntry.id).all()]
+
+    def iter_food_history(self, batch_size=1000):
+        """Yield every food entry as a row tuple, oldest first, using a server-side cursor
 
+        Rows are (date, food, calories, protein, carbs, fats, id). The session
+        stays open until the generator is exhausted or closed.
+        """
+        with self.session_scope() as session:
+            query = session.query(
+                FoodEntry.date, FoodEntry.food, FoodEntry.calories, FoodEntry.protein,
+                FoodEntry.carbs, FoodEntry.fats, FoodEntry.id
+            ).order_by(FoodEntry.date, FoodEntry.id)
+            for row in query.execution_options(stream_results=True).yield_per(batch_size):
+                yield tuple(row)
+
+    def iter_weight_history(self, batch_size=1000):
+        """Yield every weight entry as a (date, weight) tuple, oldest first, using a server-side cursor"""
+        with self.session_scope() as session:
+            query = session.query(WeightEntry.date, WeightEntry.weight).order_by(
+                WeightEntry.date, WeightEntry.id
+            )
+            for row in query.execution_options(stream_results=True).yield_per(batch_size):
+                yield tuple(row)
+
+    @_invalidates_reads
+    def save_profile(self, profile, profile_id=DEFAULT_PROFILE_ID):
+        """Save or update profile fields; keys missing from `profile` keep their stored values"""
+        with self.session_scope() as session:
+            row = session.get(Profile, profile_id)
+            if not row:
+                row = Profile(id=profile_id)
+                session.add(row)
+            for key in PROFILE_FIELDS:
+                if key in profile:
+                    setattr(row, key, profile[key])
+            row.updated_at = datetime.utcnow()
+
+    @_cached_read
+    def get_profile(self, profile_id=DEFAULT_PROFILE_ID):
+        """Get the saved profile by primary key, or {} if none was saved
+
+        Cached per process like the other reads, so reruns on any server
+        process cost no query once it has loaded the profile.
+        """
+        with self.session_scope() as session:
+            row = session.get(Profile, profile_id)
+            if not row:
+                return {}
+            return {key: getattr(row, key) for key in PROFILE_FIELDS if getattr(row, key) is not None}
+
+    @_invalidates_reads
     def save_dietary_preferences(self, preferences):
         """Save or update dietary preferences"""
-        pref = self.session.query(DietaryPreferences).first()
-        if not pref:
-            pref = DietaryPreferences(**preferences)
-            self.session.add(pref)
-        else:
-            for key, value in preferences.items():
-                setattr(pref, key, value)
-        self.session.commit()
+        with self.session_scope() as session:
+            pref = session.query(DietaryPreferences).first()
+            if not pref:
+                pref = DietaryPreferences(**preferences)
+                session.add(pref)
+            else:
+                for key, value in preferences.items():
+                    setattr(pref, key, value)
 
+    @_cached_read
     def get_dietary_preferences(self):
         """Get saved dietary preferences"""
-        pref = self.session.query(DietaryPreferences).first()
-        if not pref:
-            return {}
-        return {
-            'allergies': pref.allergies or [],
-            'restrictions': pref.restrictions or [],
-            'preferred_cuisines': pref.preferred_cuisines or [],
-            'disliked_ingredients': pref.disliked_ingredients or [],
-            'meal_timing_preferences': pref.meal_timing_preferences or {}
-        }
\ No newline at end of file
+        with self.session_scope() as session:
+            pref = session.query(DietaryPreferences).first()
+            if not pref:
+                return {}
+            return {
+                'allergies': pref.allergies or [],
+                'restrictions': pref.restrictions or [],
+                'preferred_cuisines': pref.preferred_cuisines or [],
+                'disliked_ingredients': pref.disliked_ingredients or [],
+                'meal_timing_preferences': pref.meal_timing_preferences or {}
+            }
+
+    def get_pool_stats(self):
+        """Get connection pool metrics for the shared engine"""
+        return get_pool_stats()
+
+    def get_query_cache_stats(self):
+        """Get hit/miss counters of the process-wide read cache"""
+        return get_query_cache().stats()
@@ -0,0 +1,260 @@
+import bisect
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "foods.csv")
+FORMAT_VERSION = 1
+MACROS = ("calories", "protein", "carbs", "fats")
+
+# Arrays that make up a compiled catalog; each is an .npy file opened memory-mapped
+ARRAYS = (
+    "macros",             # float32 (foods, 4): calories, protein, carbs, fats per serving
+    "strings",            # uint8: UTF-8 names followed by serving descriptions
+    "string_offsets",     # uint32 (2 * foods + 1): start of each string in `strings`
+    "trigram_keys",       # uint32: sorted distinct trigrams of normalized names
+    "trigram_offsets",    # uint32 (trigrams + 1): start of each trigram's postings
+    "postings",           # uint32: food IDs per trigram
+    "trigram_counts",     # uint16 (foods,): distinct trigrams per name
+    "tokens",             # uint8: sorted name words, concatenated
+    "token_offsets",      # uint32 (words + 1): start of each word in `tokens`
+    "token_foods",        # uint32 (words,): food ID of each word
+)
+
+# Below this trigram similarity a result needs a word-prefix match to be shown
+MIN_SIMILARITY = 0.2
+
+def normalize(text):
+    """Lowercase and keep only ASCII letters, digits, "%" (as in "Milk 2%") and single spaces"""
+    return " ".join(re.sub(r"[^0-9a-z%]+", " ", text.lower()).split())
+
+def trigrams(text, complete=True):
+    """Trigram keys of a normalized string padded with spaces
+
+    With complete=False the end is left unpadded, for a query still being typed.
+    """
+    data = (" " + text + (" " if complete else "")).encode("utf-8")
+    return {(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)}
+
+def _read_source(path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        return [{
+            'name': row['name'].strip(),
+            'serving': row.get('serving', '').strip(),
+            **{macro: float(row[macro]) for macro in MACROS}
+        } for row in csv.DictReader(handle) if row.get('name', '').strip()]
+
+def compile_catalog(records, directory):
+    """Write the memory-mappable arrays and trigram/prefix indexes for a list of foods"""
+    foods = len(records)
+    strings = [record['name'].encode("utf-8") for record in records] + \
+              [record['serving'].encode("utf-8") for record in records]
+    string_offsets = np.zeros(len(strings) + 1, dtype=np.uint32)
+    string_offsets[1:] = np.cumsum([len(value) for value in strings])
+
+    postings = {}
+    trigram_counts = np.zeros(foods, dtype=np.uint16)
+    words = []
+    for food, record in enumerate(records):
+        name = normalize(record['name'])
+        keys = trigrams(name)
+        trigram_counts[food] = len(keys)
+        for key in keys:
+            postings.setdefault(key, []).append(food)
+        words.extend((word.encode("utf-8"), food) for word in set(name.split()))
+    words.sort()
+
+    trigram_keys = np.array(sorted(postings), dtype=np.uint32)
+    trigram_offsets = np.zeros(len(trigram_keys) + 1, dtype=np.uint32)
+    trigram_offsets[1:] = np.cumsum([len(postings[key]) for key in trigram_keys])
+    token_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+    token_offsets[1:] = np.cumsum([len(word) for word, _ in words])
+
+    arrays = {
+        'macros': np.array([[record[macro] for macro in MACROS] for record in records], dtype=np.float32).reshape(-1, 4),
+        'strings': np.frombuffer(b"".join(strings), dtype=np.uint8),
+        'string_offsets': string_offsets,
+        'trigram_keys': trigram_keys,
+        'trigram_offsets': trigram_offsets,
+        'postings': np.array([food for key in trigram_keys for food in postings[key]], dtype=np.uint32),
+        'trigram_counts': trigram_counts,
+        'tokens': np.frombuffer(b"".join(word for word, _ in words), dtype=np.uint8),
+        'token_offsets': token_offsets,
+        'token_foods': np.array([food for _, food in words], dtype=np.uint32),
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+def _source_digest(path):
+    with open(path, "rb") as handle:
+        return hashlib.sha1(handle.read()).hexdigest()
+
+def build_catalog(source=DEFAULT_SOURCE, cache_dir=None):
+    """Compile a catalog CSV into a cache directory keyed by its content; returns the directory
+
+    Compilation writes to a temporary sibling and renames it into place, so
+    concurrent processes never see a half-written catalog.
+    """
+    cache_dir = cache_dir or os.environ.get('FOOD_CATALOG_CACHE_DIR') or os.path.join(
+        tempfile.gettempdir(), "health_tracker_food_catalog"
+    )
+    digest = _source_digest(source)
+    directory = os.path.join(cache_dir, f"v{FORMAT_VERSION}-{digest[:16]}")
+    if os.path.exists(os.path.join(directory, "meta.json")):
+        return directory
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        records = _read_source(source)
+        compile_catalog(records, staging)
+        with open(os.path.join(staging, "meta.json"), "w") as handle:
+            json.dump({'source': os.path.abspath(source), 'sha1': digest, 'foods': len(records),
+                       'format': FORMAT_VERSION}, handle)
+        os.rename(staging, directory)
+    except OSError:
+        # Another process finished the same build first
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            raise
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return directory
+
+class FoodCatalogIndex:
+    """Read-only food catalog over memory-mapped arrays with trigram and word-prefix indexes
+
+    Pages are only read from disk as searches touch them and are shared by
+    every process mapping the same files, so resident memory stays close to
+    the parts of the index actually used.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r'))
+        self.size = len(self.macros)
+
+    def __len__(self):
+        return self.size
+
+    def _string(self, index):
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return bytes(self.strings[start:end]).decode("utf-8")
+
+    def _token(self, index):
+        return bytes(self.tokens[self.token_offsets[index]:self.token_offsets[index + 1]])
+
+    def food(self, index):
+        """Get one food's name, serving and per-serving macros"""
+        food = {'name': self._string(index), 'serving': self._string(self.size + index)}
+        for macro, value in zip(MACROS, self.macros[index]):
+            food[macro] = float(value)
+        return food
+
+    def prefix_matches(self, prefix):
+        """IDs of foods with a name word starting with the (normalized) prefix"""
+        key = prefix.encode("utf-8")
+        words = range(len(self.token_foods))
+        start = bisect.bisect_left(words, key, key=self._token)
+        end = bisect.bisect_left(words, key + b"\xff", lo=start, key=self._token)
+        return np.asarray(self.token_foods[start:end])
+
+    def search(self, query, limit=8):
+        """Rank foods by fuzzy match against the query, best first
+
+        Scores are the trigram similarity between query and name, plus a boost
+        for names with a word starting with each query word, so both partial
+        input ("chick br") and typos ("chiken brest") find "Chicken breast".
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        foods = []
+        scores = []
+        keys = np.array(sorted(trigrams(query, complete=False)), dtype=np.uint32)
+        if len(keys) and len(self.trigram_keys):
+            positions = np.searchsorted(self.trigram_keys, keys)
+            found = positions < len(self.trigram_keys)
+            found[found] = self.trigram_keys[positions[found]] == keys[found]
+            positions = positions[found]
+            if len(positions):
+                matched, shared = np.unique(np.concatenate([
+                    self.postings[self.trigram_offsets[position]:self.trigram_offsets[position + 1]]
+                    for position in positions
+                ]), return_counts=True)
+                foods.append(matched)
+                scores.append(shared / (len(keys) + self.trigram_counts[matched] - shared))
+
+        words = query.split()
+        for word in words:
+            matched = self.prefix_matches(word)
+            foods.append(matched)
+            scores.append(np.full(len(matched), 0.5 / len(words)))
+
+        if not foods:
+            return []
+        foods, inverse = np.unique(np.concatenate(foods), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        keep = totals >= MIN_SIMILARITY
+        foods, totals = foods[keep], totals[keep]
+        # Shorter names win ties: they are the closer match for the same shared text
+        lengths = self.string_offsets[foods + 1] - self.string_offsets[foods]
+        ranking = totals - lengths * 1e-6
+        if len(foods) > limit:
+            top = np.argpartition(-ranking, limit)[:limit]
+            foods, ranking = foods[top], ranking[top]
+        return [self.food(int(food)) for food in foods[np.argsort(-ranking, kind='stable')]]
+
+    def memory_footprint(self):
+        """Bytes per mapped array, plus the total; resident memory is at most this"""
+        footprint = {name: int(getattr(self, name).nbytes) for name in ARRAYS}
+        footprint['total'] = sum(footprint.values())
+        return footprint
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_food_catalog():
+    """Get the process-wide food catalog, compiling the bundled CSV on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                source = os.environ.get('FOOD_CATALOG_PATH', DEFAULT_SOURCE)
+                _catalog = FoodCatalogIndex(build_catalog(source))
+    return _catalog
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile and query the food catalog")
+    parser.add_argument('source', nargs='?', default=os.environ.get('FOOD_CATALOG_PATH', DEFAULT_SOURCE),
+                        help="catalog CSV with name,serving,calories,protein,carbs,fats columns")
+    parser.add_argument('--search', help="print the best matches for a query")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = FoodCatalogIndex(build_catalog(args.source))
+    print(f"{len(catalog)} foods loaded from {catalog.directory} in {(time.perf_counter() - started) * 1000:.1f}ms")
+    footprint = catalog.memory_footprint()
+    print(f"Mapped size: {footprint['total'] / 1024:.1f} KiB "
+          f"({footprint['total'] / max(len(catalog), 1):.0f} bytes per food)")
+    if args.search:
+        started = time.perf_counter()
+        results = catalog.search(args.search)
+        elapsed = time.perf_counter() - started
+        for food in results:
+            print(f"  {food['name']} ({food['serving']}): {food['calories']:.0f} kcal, "
+                  f"{food['protein']:g}g protein, {food['carbs']:g}g carbs, {food['fats']:g}g fats")
+        print(f"Search took {elapsed * 1000:.3f}ms")
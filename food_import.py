@@ -0,0 +1,182 @@
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import time
+from datetime import date as datetime_date, datetime
+
+REQUIRED_FIELDS = ('date', 'food', 'calories', 'protein', 'carbs', 'fats')
+NUMERIC_FIELDS = ('calories', 'protein', 'carbs', 'fats')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# A JSON array element that has not closed within this many characters is treated as malformed
+MAX_RECORD_CHARS = 1024 * 1024
+
+def validate_food_record(record):
+    """Validate and normalize one imported record, raising ValueError if it is unusable"""
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+
+    date = record['date']
+    if isinstance(date, datetime):
+        date = date.date()
+    elif isinstance(date, str):
+        try:
+            date = datetime.strptime(date.strip()[:10], '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"invalid date {record['date']!r}, expected YYYY-MM-DD")
+    elif not isinstance(date, datetime_date):
+        raise ValueError(f"invalid date {record['date']!r}, expected YYYY-MM-DD")
+
+    entry = {'date': date, 'food': str(record['food']).strip()}
+    if not entry['food']:
+        raise ValueError("empty food name")
+    for field in NUMERIC_FIELDS:
+        try:
+            value = float(record[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} is not a number: {record[field]!r}")
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{field} must be a finite, non-negative number")
+        entry[field] = value
+    return entry
+
+def iter_csv_records(stream):
+    """Yield records from a CSV stream with a header row"""
+    for record in csv.DictReader(stream):
+        yield {key.strip().lower(): value for key, value in record.items() if key}
+
+def iter_json_records(stream, read_size=65536):
+    """Yield records from a JSON array or newline-delimited JSON stream
+
+    NDJSON is read one line at a time. A line that is not a JSON object is
+    yielded as a ValueError so the caller can reject it and carry on. A JSON
+    array is decoded one element at a time from a rolling buffer, so memory
+    stays bounded by the largest single record; a malformed array cannot be
+    resynchronized and raises ValueError.
+    """
+    head = stream.read(read_size)
+    if head.lstrip().startswith('['):
+        yield from _iter_json_array(stream, head, read_size)
+        return
+
+    lines = itertools.chain(io.StringIO(head).readlines(), stream) if head else ()
+    pending = ''
+    for line in lines:
+        # The first read can end mid-line; join it with the rest of that line
+        if not line.endswith('\n'):
+            pending += line
+            continue
+        line, pending = pending + line, ''
+        if line.strip():
+            yield _decode_json_line(line)
+    if pending.strip():
+        yield _decode_json_line(pending)
+
+def _decode_json_line(line):
+    """Decode one NDJSON line into a record, or return (not raise) a ValueError saying why it is unusable"""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return ValueError(f"invalid JSON: {e.msg}")
+    if not isinstance(record, dict):
+        return ValueError(f"expected a JSON object, got {type(record).__name__}")
+    return {key.lower(): value for key, value in record.items()}
+
+def _iter_json_array(stream, buffer, read_size):
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+                position += 1
+            if position == len(buffer):
+                break
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof or len(buffer) - position > MAX_RECORD_CHARS:
+                    raise ValueError(f"malformed JSON array: {e.msg}") from e
+                break
+            if not isinstance(record, dict):
+                yield ValueError(f"expected a JSON object, got {type(record).__name__}")
+            else:
+                yield {key.lower(): value for key, value in record.items()}
+            position = end
+
+        buffer = buffer[position:]
+        if eof:
+            return
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+            if not buffer.strip(' \t\r\n,[]'):
+                return
+        buffer += chunk
+
+def import_food_log(data_manager, stream, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream food records into the food log in validated chunks
+
+    Invalid records are skipped and reported with their position in the input.
+    Returns a summary dict with inserted/rejected counts, elapsed seconds and rows_per_sec.
+    """
+    records = iter_csv_records(stream) if file_format == 'csv' else iter_json_records(stream)
+
+    started = time.perf_counter()
+    inserted = 0
+    rejected = 0
+    errors = []
+    chunk = []
+    for number, record in enumerate(records, start=1):
+        try:
+            # Records the reader could not decode arrive as ValueError instances
+            if isinstance(record, ValueError):
+                raise record
+            chunk.append(validate_food_record(record))
+        except ValueError as e:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"record {number}: {e}")
+            continue
+        if len(chunk) >= chunk_size:
+            inserted += data_manager.add_food_entries(chunk)
+            chunk = []
+    if chunk:
+        inserted += data_manager.add_food_entries(chunk)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'inserted': inserted,
+        'rejected': rejected,
+        'errors': errors,
+        'seconds': elapsed,
+        'rows_per_sec': inserted / elapsed if elapsed > 0 else 0.0
+    }
+
+def import_food_log_file(data_manager, path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import a CSV, JSON or NDJSON file, inferring the format from the extension"""
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = 'csv' if extension == '.csv' else 'json'
+    with open(path, newline='', encoding='utf-8') as stream:
+        return import_food_log(data_manager, stream, file_format, chunk_size)
+
+if __name__ == "__main__":
+    import argparse
+    from data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="Bulk import historical food log entries")
+    parser.add_argument('path', help="CSV (with header) or JSON/NDJSON file")
+    parser.add_argument('--format', choices=['csv', 'json'], help="override format detection")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    result = import_food_log_file(DataManager(), args.path, args.format, args.chunk_size)
+    print(f"Inserted {result['inserted']} rows in {result['seconds']:.2f}s "
+          f"({result['rows_per_sec']:.0f} rows/sec), rejected {result['rejected']}")
+    for error in result['errors']:
+        print(f"  {error}")
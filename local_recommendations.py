@@ -0,0 +1,551 @@
+import json
+from utils import calculate_bmr, calculate_tdee, get_macro_split, get_workout_recommendation, CALORIES_PER_GRAM
+
+# Each meal: name, slot, cuisine, ingredients, tags (allergens and diet-relevant
+# categories, lowercase to match the preference options) and per-serving macros
+MEAL_LIBRARY = [
+    # Breakfast
+    {"name": "Greek yogurt parfait with berries and granola", "slot": "breakfast", "cuisine": "mediterranean",
+     "ingredients": ["greek yogurt", "berries", "granola", "honey"], "tags": ["dairy", "gluten", "grains", "honey"],
+     "calories": 332, "protein": 20, "carbs": 45, "fats": 8},
+    {"name": "Veggie egg scramble with whole-grain toast", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["eggs", "spinach", "tomato", "whole-grain bread"], "tags": ["eggs", "wheat", "gluten", "grains"],
+     "calories": 344, "protein": 22, "carbs": 28, "fats": 16},
+    {"name": "Overnight oats with chia and banana", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["oats", "chia seeds", "banana", "oat milk"], "tags": ["gluten", "grains"],
+     "calories": 370, "protein": 12, "carbs": 58, "fats": 10},
+    {"name": "Tofu scramble with peppers and avocado", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["tofu", "bell pepper", "avocado"], "tags": ["soy", "legumes"],
+     "calories": 324, "protein": 24, "carbs": 12, "fats": 20},
+    {"name": "Spinach and feta omelette", "slot": "breakfast", "cuisine": "mediterranean",
+     "ingredients": ["eggs", "spinach", "feta"], "tags": ["eggs", "dairy"],
+     "calories": 318, "protein": 26, "carbs": 4, "fats": 22},
+    {"name": "Smoked salmon on rye with cream cheese", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["smoked salmon", "rye bread", "cream cheese"], "tags": ["fish", "dairy", "gluten", "grains"],
+     "calories": 342, "protein": 24, "carbs": 30, "fats": 14},
+    {"name": "Egg and black bean breakfast bowl with salsa", "slot": "breakfast", "cuisine": "mexican",
+     "ingredients": ["eggs", "black beans", "corn tortilla", "salsa"], "tags": ["eggs", "legumes", "grains"],
+     "calories": 374, "protein": 22, "carbs": 40, "fats": 14},
+    {"name": "Masala oats with peas and carrots", "slot": "breakfast", "cuisine": "indian",
+     "ingredients": ["oats", "peas", "carrot", "mustard seeds"], "tags": ["gluten", "grains", "legumes"],
+     "calories": 304, "protein": 10, "carbs": 48, "fats": 8},
+    {"name": "Peanut butter banana toast", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["whole-grain bread", "peanut butter", "banana"], "tags": ["peanuts", "wheat", "gluten", "grains"],
+     "calories": 392, "protein": 14, "carbs": 48, "fats": 16},
+    {"name": "Chia pudding with coconut milk and mango", "slot": "breakfast", "cuisine": "thai",
+     "ingredients": ["chia seeds", "coconut milk", "mango"], "tags": [],
+     "calories": 354, "protein": 8, "carbs": 40, "fats": 18},
+    {"name": "Sweet potato hash with turkey sausage", "slot": "breakfast", "cuisine": "american",
+     "ingredients": ["sweet potato", "turkey sausage", "kale"], "tags": ["meat"],
+     "calories": 350, "protein": 24, "carbs": 32, "fats": 14},
+    # Lunch
+    {"name": "Grilled chicken quinoa bowl", "slot": "lunch", "cuisine": "mediterranean",
+     "ingredients": ["chicken breast", "quinoa", "cucumber", "tomato", "olive oil"], "tags": ["meat", "grains"],
+     "calories": 466, "protein": 40, "carbs": 45, "fats": 14},
+    {"name": "Lentil and vegetable soup with a side salad", "slot": "lunch", "cuisine": "mediterranean",
+     "ingredients": ["lentils", "carrot", "celery", "spinach"], "tags": ["legumes"],
+     "calories": 372, "protein": 20, "carbs": 55, "fats": 8},
+    {"name": "Turkey and avocado whole-wheat wrap", "slot": "lunch", "cuisine": "american",
+     "ingredients": ["turkey", "avocado", "lettuce", "whole-wheat tortilla"], "tags": ["meat", "wheat", "gluten", "grains"],
+     "calories": 440, "protein": 32, "carbs": 42, "fats": 16},
+    {"name": "Tuna nicoise salad", "slot": "lunch", "cuisine": "mediterranean",
+     "ingredients": ["tuna", "eggs", "green beans", "potato", "olives"], "tags": ["fish", "eggs"],
+     "calories": 418, "protein": 36, "carbs": 28, "fats": 18},
+    {"name": "Chickpea and spinach curry with brown rice", "slot": "lunch", "cuisine": "indian",
+     "ingredients": ["chickpeas", "spinach", "tomato", "brown rice", "coconut milk"], "tags": ["legumes", "grains"],
+     "calories": 470, "protein": 16, "carbs": 70, "fats": 14},
+    {"name": "Chicken burrito bowl", "slot": "lunch", "cuisine": "mexican",
+     "ingredients": ["chicken breast", "brown rice", "black beans", "salsa", "cheese"],
+     "tags": ["meat", "legumes", "dairy", "grains"],
+     "calories": 534, "protein": 42, "carbs": 60, "fats": 14},
+    {"name": "Salmon poke bowl", "slot": "lunch", "cuisine": "japanese",
+     "ingredients": ["salmon", "sushi rice", "edamame", "cucumber", "soy sauce"],
+     "tags": ["fish", "soy", "legumes", "wheat", "gluten", "grains"],
+     "calories": 512, "protein": 34, "carbs": 58, "fats": 16},
+    {"name": "Cobb salad with grilled chicken", "slot": "lunch", "cuisine": "american",
+     "ingredients": ["chicken breast", "bacon", "eggs", "avocado", "blue cheese"], "tags": ["meat", "pork", "eggs", "dairy"],
+     "calories": 496, "protein": 42, "carbs": 10, "fats": 32},
+    {"name": "Caprese whole-grain pasta salad", "slot": "lunch", "cuisine": "italian",
+     "ingredients": ["whole-grain pasta", "mozzarella", "tomato", "basil", "olive oil"],
+     "tags": ["wheat", "gluten", "dairy", "grains"],
+     "calories": 472, "protein": 20, "carbs": 62, "fats": 16},
+    {"name": "Thai peanut tofu noodle salad", "slot": "lunch", "cuisine": "thai",
+     "ingredients": ["tofu", "rice noodles", "peanuts", "cabbage", "lime"], "tags": ["soy", "legumes", "peanuts", "grains"],
+     "calories": 482, "protein": 22, "carbs": 58, "fats": 18},
+    {"name": "Beef and broccoli stir-fry with rice", "slot": "lunch", "cuisine": "chinese",
+     "ingredients": ["beef", "broccoli", "rice", "soy sauce", "ginger"], "tags": ["meat", "soy", "wheat", "gluten", "grains"],
+     "calories": 478, "protein": 36, "carbs": 52, "fats": 14},
+    # Dinner
+    {"name": "Baked salmon with sweet potato and broccoli", "slot": "dinner", "cuisine": "american",
+     "ingredients": ["salmon", "sweet potato", "broccoli"], "tags": ["fish"],
+     "calories": 474, "protein": 38, "carbs": 40, "fats": 18},
+    {"name": "Chicken and vegetable stir-fry with brown rice", "slot": "dinner", "cuisine": "chinese",
+     "ingredients": ["chicken breast", "bell pepper", "broccoli", "brown rice", "soy sauce"],
+     "tags": ["meat", "soy", "wheat", "gluten", "grains"],
+     "calories": 468, "protein": 40, "carbs": 50, "fats": 12},
+    {"name": "Turkey chili with kidney beans", "slot": "dinner", "cuisine": "american",
+     "ingredients": ["turkey", "kidney beans", "tomato", "onion"], "tags": ["meat", "legumes"],
+     "calories": 428, "protein": 38, "carbs": 42, "fats": 12},
+    {"name": "Beef and vegetable skewers with cauliflower rice", "slot": "dinner", "cuisine": "mediterranean",
+     "ingredients": ["beef", "zucchini", "onion", "cauliflower"], "tags": ["meat"],
+     "calories": 424, "protein": 40, "carbs": 12, "fats": 24},
+    {"name": "Tofu and vegetable green curry with jasmine rice", "slot": "dinner", "cuisine": "thai",
+     "ingredients": ["tofu", "coconut milk", "green beans", "jasmine rice"], "tags": ["soy", "legumes", "grains"],
+     "calories": 508, "protein": 22, "carbs": 60, "fats": 20},
+    {"name": "Whole-wheat spaghetti with turkey bolognese", "slot": "dinner", "cuisine": "italian",
+     "ingredients": ["turkey", "whole-wheat spaghetti", "tomato", "parmesan"], "tags": ["meat", "wheat", "gluten", "dairy", "grains"],
+     "calories": 526, "protein": 38, "carbs": 62, "fats": 14},
+    {"name": "Grilled shrimp tacos with slaw", "slot": "dinner", "cuisine": "mexican",
+     "ingredients": ["shrimp", "corn tortillas", "cabbage", "lime", "avocado"], "tags": ["shellfish", "grains"],
+     "calories": 430, "protein": 32, "carbs": 44, "fats": 14},
+    {"name": "Tandoori chicken with dal and basmati rice", "slot": "dinner", "cuisine": "indian",
+     "ingredients": ["chicken breast", "yogurt", "lentils", "basmati rice"], "tags": ["meat", "dairy", "legumes", "grains"],
+     "calories": 504, "protein": 44, "carbs": 55, "fats": 12},
+    {"name": "Miso-glazed cod with soba and bok choy", "slot": "dinner", "cuisine": "japanese",
+     "ingredients": ["cod", "miso", "soba noodles", "bok choy"], "tags": ["fish", "soy", "wheat", "gluten", "grains"],
+     "calories": 400, "protein": 34, "carbs": 48, "fats": 8},
+    {"name": "Stuffed peppers with black beans, quinoa and cheese", "slot": "dinner", "cuisine": "mexican",
+     "ingredients": ["bell pepper", "black beans", "quinoa", "cheese"], "tags": ["legumes", "dairy", "grains"],
+     "calories": 422, "protein": 22, "carbs": 52, "fats": 14},
+    {"name": "Herb-roasted chicken thighs with roasted vegetables", "slot": "dinner", "cuisine": "mediterranean",
+     "ingredients": ["chicken thighs", "zucchini", "carrot", "olive oil"], "tags": ["meat"],
+     "calories": 414, "protein": 36, "carbs": 18, "fats": 22},
+    {"name": "Eggplant and chickpea tagine with couscous", "slot": "dinner", "cuisine": "mediterranean",
+     "ingredients": ["eggplant", "chickpeas", "tomato", "couscous"], "tags": ["legumes", "wheat", "gluten", "grains"],
+     "calories": 436, "protein": 16, "carbs": 66, "fats": 12},
+    {"name": "Black bean and sweet potato bowl with salsa and avocado", "slot": "dinner", "cuisine": "mexican",
+     "ingredients": ["black beans", "sweet potato", "salsa", "avocado"], "tags": ["legumes"],
+     "calories": 478, "protein": 18, "carbs": 70, "fats": 14},
+    # Snacks
+    {"name": "Apple with almond butter", "slot": "snack", "cuisine": "american",
+     "ingredients": ["apple", "almond butter"], "tags": ["tree nuts"],
+     "calories": 220, "protein": 6, "carbs": 22, "fats": 12},
+    {"name": "Greek yogurt with honey", "slot": "snack", "cuisine": "mediterranean",
+     "ingredients": ["greek yogurt", "honey"], "tags": ["dairy", "honey"],
+     "calories": 150, "protein": 17, "carbs": 16, "fats": 2},
+    {"name": "Hummus with carrot and cucumber sticks", "slot": "snack", "cuisine": "mediterranean",
+     "ingredients": ["hummus", "carrot", "cucumber"], "tags": ["legumes"],
+     "calories": 177, "protein": 6, "carbs": 18, "fats": 9},
+    {"name": "Two hard-boiled eggs", "slot": "snack", "cuisine": "american",
+     "ingredients": ["eggs"], "tags": ["eggs"],
+     "calories": 142, "protein": 12, "carbs": 1, "fats": 10},
+    {"name": "Mixed nuts (30 g)", "slot": "snack", "cuisine": "american",
+     "ingredients": ["mixed nuts"], "tags": ["tree nuts", "peanuts"],
+     "calories": 183, "protein": 6, "carbs": 6, "fats": 15},
+    {"name": "Cottage cheese with pineapple", "slot": "snack", "cuisine": "american",
+     "ingredients": ["cottage cheese", "pineapple"], "tags": ["dairy"],
+     "calories": 139, "protein": 14, "carbs": 14, "fats": 3},
+    {"name": "Edamame with sea salt", "slot": "snack", "cuisine": "japanese",
+     "ingredients": ["edamame"], "tags": ["soy", "legumes"],
+     "calories": 142, "protein": 12, "carbs": 10, "fats": 6},
+    {"name": "Banana protein smoothie", "slot": "snack", "cuisine": "american",
+     "ingredients": ["whey protein", "banana", "milk"], "tags": ["dairy"],
+     "calories": 268, "protein": 28, "carbs": 30, "fats": 4},
+    {"name": "Rice cakes with avocado", "slot": "snack", "cuisine": "american",
+     "ingredients": ["rice cakes", "avocado"], "tags": ["grains"],
+     "calories": 172, "protein": 3, "carbs": 22, "fats": 8},
+    {"name": "Roasted chickpeas", "slot": "snack", "cuisine": "indian",
+     "ingredients": ["chickpeas"], "tags": ["legumes"],
+     "calories": 165, "protein": 8, "carbs": 22, "fats": 5},
+    {"name": "Beef jerky", "slot": "snack", "cuisine": "american",
+     "ingredients": ["beef jerky"], "tags": ["meat"],
+     "calories": 94, "protein": 13, "carbs": 6, "fats": 2},
+    {"name": "Dark chocolate with strawberries", "slot": "snack", "cuisine": "american",
+     "ingredients": ["dark chocolate", "strawberries"], "tags": [],
+     "calories": 169, "protein": 2, "carbs": 20, "fats": 9},
+]
+
+# Tags each dietary restriction rules out, and per-serving carb caps
+RESTRICTION_EXCLUDED_TAGS = {
+    "vegetarian": {"meat", "pork", "fish", "shellfish"},
+    "vegan": {"meat", "pork", "fish", "shellfish", "dairy", "eggs", "honey"},
+    "gluten-free": {"gluten"},
+    "kosher": {"pork", "shellfish"},
+    "halal": {"pork"},
+    "paleo": {"dairy", "gluten", "grains", "legumes", "soy"},
+}
+RESTRICTION_MAX_CARBS = {"keto": 15, "low-carb": 30}
+
+INGREDIENT_CATEGORIES = {
+    "Proteins": {"chicken breast", "chicken thighs", "turkey", "turkey sausage", "beef", "beef jerky", "bacon",
+                 "salmon", "smoked salmon", "tuna", "cod", "shrimp", "tofu", "eggs", "whey protein"},
+    "Dairy": {"greek yogurt", "yogurt", "feta", "cream cheese", "cheese", "blue cheese", "mozzarella",
+              "parmesan", "cottage cheese", "milk"},
+    "Grains & starches": {"granola", "oats", "whole-grain bread", "rye bread", "corn tortilla", "corn tortillas",
+                          "quinoa", "brown rice", "rice", "sushi rice", "basmati rice", "jasmine rice",
+                          "whole-wheat tortilla", "whole-grain pasta", "whole-wheat spaghetti", "rice noodles",
+                          "soba noodles", "couscous", "rice cakes", "potato", "sweet potato"},
+    "Legumes, nuts & seeds": {"black beans", "kidney beans", "lentils", "chickpeas", "hummus", "edamame", "peas",
+                              "peanuts", "peanut butter", "almond butter", "mixed nuts", "chia seeds"},
+}
+
+# Base meal shares of daily calories; snacks take 10% each, up to 30%
+MEAL_SHARES = {"breakfast": 0.28, "lunch": 0.37, "dinner": 0.35}
+SNACK_SHARE = 0.10
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+GOAL_FOODS = {
+    "Weight Loss": {
+        "include": {
+            "Leafy greens and non-starchy vegetables": "High volume and fibre for few calories keep you full",
+            "Lean proteins (chicken breast, fish, tofu, Greek yogurt)": "Protect muscle in a deficit and curb hunger",
+            "Legumes": "Protein plus fibre for steady energy",
+            "Berries and whole fruit": "Satisfy sweet cravings with fibre and antioxidants",
+            "Whole grains in measured portions": "Slow-digesting carbohydrates for training energy",
+        },
+        "avoid": {
+            "Sugary drinks and juices": "Liquid calories add up without making you feel full",
+            "Fried and heavily processed foods": "Calorie-dense and easy to overeat",
+            "Refined snacks and pastries": "Spike blood sugar and hunger",
+            "Alcohol": "Empty calories that also loosen food choices",
+        },
+    },
+    "Muscle Gain": {
+        "include": {
+            "Lean meats, fish, eggs and dairy": "Complete proteins for muscle repair and growth",
+            "Rice, oats, potatoes and whole-grain pasta": "Carbohydrates fuel hard training and recovery",
+            "Nuts, nut butters and olive oil": "Calorie-dense healthy fats help reach a surplus",
+            "Legumes and tofu": "Extra protein and micronutrients",
+            "Fruit and vegetables": "Vitamins and minerals for recovery",
+        },
+        "avoid": {
+            "Skipping meals": "Makes the daily calorie surplus hard to reach",
+            "Excess alcohol": "Impairs muscle protein synthesis and sleep",
+            "Highly processed junk food": "Adds fat gain without quality nutrients",
+        },
+    },
+    "Maintenance": {
+        "include": {
+            "A variety of vegetables and fruit": "Broad micronutrient coverage",
+            "Lean proteins at every meal": "Maintain muscle and keep meals satisfying",
+            "Whole grains": "Fibre and steady energy",
+            "Healthy fats (olive oil, avocado, nuts)": "Support hormones and heart health",
+        },
+        "avoid": {
+            "Ultra-processed snacks": "Easy to overeat and low in nutrients",
+            "Sugary drinks": "Add calories without satiety",
+            "Large late-night meals": "Can disrupt sleep and appetite rhythms",
+        },
+    },
+}
+
+EXERCISES = {
+    "Weight Loss": ["Goblet squats", "Push-ups", "Dumbbell rows", "Walking lunges", "Kettlebell swings", "Plank"],
+    "Muscle Gain": ["Back squats", "Bench press", "Barbell rows", "Romanian deadlifts", "Overhead press", "Pull-ups"],
+    "Maintenance": ["Squats", "Push-ups", "Rows", "Hip thrusts", "Shoulder press", "Dead bugs"],
+}
+ALTERNATIVES = {
+    "Goblet squats": "Box squats or leg press", "Back squats": "Goblet squats or leg press",
+    "Squats": "Box squats or split squats", "Push-ups": "Incline push-ups or chest press machine",
+    "Bench press": "Dumbbell press or push-ups", "Dumbbell rows": "Cable rows or band rows",
+    "Barbell rows": "Dumbbell rows or chest-supported rows", "Rows": "Band rows or inverted rows",
+    "Walking lunges": "Step-ups or reverse lunges", "Kettlebell swings": "Hip thrusts or glute bridges",
+    "Plank": "Dead bugs or bird dogs", "Romanian deadlifts": "Hip thrusts or back extensions",
+    "Overhead press": "Landmine press or dumbbell press", "Pull-ups": "Lat pulldowns or band-assisted pull-ups",
+    "Hip thrusts": "Glute bridges or cable pull-throughs", "Shoulder press": "Lateral raises or landmine press",
+    "Dead bugs": "Plank or bird dogs",
+}
+SETS = {"Beginner": "2-3", "Intermediate": "3-4", "Advanced": "4-5"}
+REPS = {"Weight Loss": "12-15", "Muscle Gain": "6-10", "Maintenance": "8-12"}
+REST = {"Weight Loss": "30-60 seconds", "Muscle Gain": "90-180 seconds", "Maintenance": "60-90 seconds"}
+
+def _daily_targets(age, weight, height, gender, activity_level, goal):
+    """Calorie and macro gram targets, matching the profile page"""
+    calories = calculate_tdee(calculate_bmr(weight, height, age, gender), activity_level)
+    split = get_macro_split(goal)
+    targets = {'calories': round(calories)}
+    for macro, per_gram in CALORIES_PER_GRAM.items():
+        targets[macro] = round(calories * split[macro] / per_gram)
+    return targets
+
+def _snack_count(dietary_preferences):
+    return int((dietary_preferences.get('meal_timing_preferences') or {}).get('snacks_count', 2) or 0)
+
+def _slot_calories(calories, snacks):
+    """Split daily calories over the meal slots"""
+    snack_total = min(0.3, SNACK_SHARE * snacks)
+    shares = {slot: share * (1 - snack_total) for slot, share in MEAL_SHARES.items()}
+    return {slot: calories * share for slot, share in shares.items()}, (
+        calories * snack_total / snacks if snacks else 0.0
+    )
+
+def meal_allowed(meal, dietary_preferences):
+    """Whether a meal respects the allergies, restrictions and disliked ingredients"""
+    tags = set(meal['tags'])
+    if tags & {allergy.lower() for allergy in dietary_preferences.get('allergies') or []}:
+        return False
+    for restriction in dietary_preferences.get('restrictions') or []:
+        restriction = restriction.lower()
+        if tags & RESTRICTION_EXCLUDED_TAGS.get(restriction, set()):
+            return False
+        if meal['carbs'] > RESTRICTION_MAX_CARBS.get(restriction, float('inf')):
+            return False
+    text = " ".join([meal['name']] + meal['ingredients']).lower()
+    return not any(
+        disliked.strip().lower() in text for disliked in dietary_preferences.get('disliked_ingredients') or []
+        if disliked.strip()
+    )
+
+def _macro_mismatch(meal, goal):
+    """How far a meal's calorie shares are from the goal's macro split"""
+    split = get_macro_split(goal)
+    total = sum(meal[macro] * per_gram for macro, per_gram in CALORIES_PER_GRAM.items()) or 1
+    return sum(abs(meal[macro] * per_gram / total - split[macro]) for macro, per_gram in CALORIES_PER_GRAM.items())
+
+def _candidates(slot, goal, dietary_preferences):
+    """Allowed meals for a slot, preferred cuisines first, then closest to the goal's macro split"""
+    cuisines = {cuisine.lower() for cuisine in dietary_preferences.get('preferred_cuisines') or []}
+    meals = [meal for meal in MEAL_LIBRARY if meal['slot'] == slot and meal_allowed(meal, dietary_preferences)]
+    return sorted(meals, key=lambda meal: (meal['cuisine'] not in cuisines, _macro_mismatch(meal, goal), meal['name']))
+
+def _portion(meal, target_calories):
+    """Describe a meal scaled to the slot's calorie target in quarter servings"""
+    if meal is None:
+        return {
+            "meal": "Build-your-own plate: a protein, vegetables and a healthy fat that fit your restrictions",
+            "calories": round(target_calories)
+        }
+    servings = min(2.5, max(0.5, round(target_calories / meal['calories'] * 4) / 4))
+    return {
+        "meal": meal['name'],
+        "servings": servings,
+        "calories": round(meal['calories'] * servings),
+        "protein_g": round(meal['protein'] * servings),
+        "carbs_g": round(meal['carbs'] * servings),
+        "fats_g": round(meal['fats'] * servings),
+    }
+
+def _day_plan(goal, dietary_preferences, calories, day_index):
+    """Meals for one day, rotating through the ranked candidates so days differ"""
+    snacks = _snack_count(dietary_preferences)
+    slot_targets, snack_target = _slot_calories(calories, snacks)
+    timing = dietary_preferences.get('meal_timing_preferences') or {}
+    plan = {}
+    for slot, target in slot_targets.items():
+        options = _candidates(slot, goal, dietary_preferences)
+        meal = options[day_index % len(options)] if options else None
+        entry = _portion(meal, target)
+        if timing.get(slot):
+            entry["time"] = timing[slot]
+        plan[slot.capitalize()] = entry
+    snack_options = _candidates("snack", goal, dietary_preferences)
+    for number in range(snacks):
+        meal = snack_options[(day_index + number) % len(snack_options)] if snack_options else None
+        plan[f"Snack {number + 1}"] = _portion(meal, snack_target)
+    return plan
+
+def _hydration_liters(weight, activity_level):
+    """About 35 ml per kg, plus half a litre per activity step above sedentary"""
+    steps = ["Sedentary", "Lightly Active", "Moderately Active", "Very Active", "Extra Active"]
+    extra = 0.5 * steps.index(activity_level) if activity_level in steps else 0.0
+    return round(weight * 0.035 + extra, 1)
+
+def local_diet_recommendations(age, weight, height, gender, activity_level, goal, current_diet=None):
+    """Rule-based diet recommendations with the same JSON keys as the AI response"""
+    targets = _daily_targets(age, weight, height, gender, activity_level, goal)
+    foods = GOAL_FOODS[goal]
+    plan = _day_plan(goal, {'meal_timing_preferences': {'snacks_count': 2}}, targets['calories'], 0)
+    plan["Daily targets"] = (
+        f"{targets['calories']} kcal: {targets['protein']} g protein, "
+        f"{targets['carbs']} g carbs, {targets['fats']} g fats"
+    )
+    supplements = ["Vitamin D3 (1000-2000 IU) if you get little sun", "Omega-3 fish oil or algae oil (1-2 g EPA/DHA)"]
+    if goal == "Muscle Gain":
+        supplements.append("Creatine monohydrate (3-5 g daily)")
+    if goal != "Maintenance" or weight * 1.6 > targets['protein']:
+        supplements.append("Protein powder when whole-food protein falls short of your target")
+    if age >= 50:
+        supplements.append("Vitamin B12 and calcium; check levels with your doctor")
+
+    return json.dumps({
+        "meal_plan": plan,
+        "foods_to_include": foods["include"],
+        "foods_to_avoid": foods["avoid"],
+        "timing_tips": [
+            "Eat protein at every meal, about "
+            f"{round(targets['protein'] / 4)} g each across 4 meals and snacks",
+            "Have a carbohydrate and protein meal 1-3 hours before training",
+            "Eat a protein-rich meal within 2 hours after training",
+            "Keep meal times consistent to regulate hunger",
+        ],
+        "supplements": supplements,
+        "meal_prep_tips": [
+            "Batch-cook two proteins and two grains on the weekend",
+            "Pre-cut vegetables for quick stir-fries and salads",
+            "Portion meals into containers that match your calorie targets",
+            "Keep ready-to-eat protein snacks (yogurt, eggs, jerky) on hand",
+        ],
+        "dining_out_tips": [
+            "Choose grilled, baked or steamed dishes over fried ones",
+            "Ask for sauces and dressings on the side",
+            "Fill half the plate with vegetables and add a palm-sized protein",
+            "Check the menu ahead of time and decide before you arrive",
+        ],
+        "hydration": {
+            "daily_target_liters": _hydration_liters(weight, activity_level),
+            "tips": [
+                "Drink a glass of water when you wake up and with each meal",
+                "Add 0.5-1 litre for each hour of exercise",
+                "Pale yellow urine is a good sign of adequate hydration",
+            ],
+        },
+    })
+
+def local_workout_recommendations(age, fitness_level, goal, medical_conditions=None):
+    """Rule-based workout recommendations with the same JSON keys as the AI response"""
+    sessions = get_workout_recommendation(goal, fitness_level)
+    days = ["Monday", "Wednesday", "Friday"] if fitness_level == "Beginner" else \
+           ["Monday", "Tuesday", "Thursday", "Friday", "Saturday"]
+    schedule = {day: sessions[index % len(sessions)] for index, day in enumerate(days)}
+    schedule.update({day: "Rest or light walking" for day in DAYS if day not in schedule})
+    exercises = EXERCISES[goal]
+    low_impact = age >= 50
+    conditions = medical_conditions if medical_conditions and medical_conditions != "None" else None
+
+    injury_prevention = [
+        "Use a load you can move with good form for every rep",
+        "Increase weight or volume by no more than about 10% per week",
+        "Stop an exercise that causes sharp pain rather than muscle fatigue",
+    ]
+    if low_impact:
+        injury_prevention.append("Prefer low-impact cardio (cycling, swimming, brisk walking) to protect joints")
+    if conditions:
+        injury_prevention.append(f"Check this plan with your doctor given: {conditions}")
+
+    return json.dumps({
+        "weekly_schedule": {day: schedule[day] for day in DAYS},
+        "exercise_details": {
+            exercise: f"{SETS[fitness_level]} sets x {REPS[goal]} reps, controlled tempo, 1-3 reps in reserve"
+            for exercise in exercises
+        },
+        "progression_plan": {
+            "Weeks 1-2": "Learn the movements at the lower end of the set range",
+            "Weeks 3-4": "Add one set to main lifts or 5-10% more load",
+            "Weeks 5-6": "Work at the top of the rep range, then increase load",
+            "Week 7": "Peak week: heaviest loads with full rest periods",
+            "Week 8": "Deload: half the sets at about 70% of recent loads",
+        },
+        "recovery_tips": [
+            "Sleep 7-9 hours per night",
+            "Spend 10 minutes on mobility for hips, shoulders and thoracic spine after sessions",
+            "Leave 48 hours before training the same muscle group hard again",
+            "Take an easy walk on rest days to aid recovery",
+        ],
+        "warmup_cooldown": {
+            "warmup": ["5 minutes of easy cardio", "Dynamic stretches: leg swings, arm circles, hip openers",
+                       f"1-2 light sets of {exercises[0].lower()}"],
+            "cooldown": ["5 minutes of easy walking", "Static stretches held 30 seconds for worked muscles",
+                         "Slow breathing to bring the heart rate down"],
+        },
+        "tracking_metrics": [
+            "Weights, sets and reps for each exercise",
+            "Body weight 2-3 times a week at the same time of day",
+            "Waist measurement every 2 weeks",
+            "Resting heart rate and session energy level (1-10)",
+        ],
+        "alternative_exercises": {exercise: ALTERNATIVES.get(exercise, "Any similar movement") for exercise in exercises},
+        "injury_prevention": injury_prevention,
+        "rest_guidelines": {
+            "between_sets": REST[goal],
+            "between_sessions": "At least one rest day after two consecutive training days",
+            "deload": "Every 6-8 weeks, reduce volume by half for a week",
+        },
+        "cardio_integration": {
+            "Weight Loss": "2-3 cardio sessions of 20-40 minutes plus a daily step goal of 8,000-10,000",
+            "Muscle Gain": "2 short low-intensity sessions of 20 minutes, kept away from leg days",
+            "Maintenance": "2-3 mixed sessions of 30 minutes, one of them intervals",
+        }[goal] + (" (low-impact options recommended)" if low_impact else ""),
+    })
+
+def _shopping_list(week):
+    """Group the ingredients of a week's meals by store section"""
+    names = {meal['name']: meal for meal in MEAL_LIBRARY}
+    items = {}
+    for day in week.values():
+        for entry in day.values():
+            meal = names.get(entry.get('meal'))
+            for ingredient in meal['ingredients'] if meal else []:
+                category = next(
+                    (name for name, members in INGREDIENT_CATEGORIES.items() if ingredient in members),
+                    "Produce & pantry"
+                )
+                items.setdefault(category, set()).add(ingredient)
+    return {category: sorted(ingredients) for category, ingredients in sorted(items.items())}
+
+def local_personalized_diet_plan(profile, dietary_preferences):
+    """Rule-based weekly diet plan with the same JSON keys as the AI response"""
+    targets = _daily_targets(
+        profile['age'], profile['weight'], profile['height'],
+        profile['gender'], profile['activity_level'], profile['goal']
+    )
+    week = {
+        day: _day_plan(profile['goal'], dietary_preferences, targets['calories'], index)
+        for index, day in enumerate(DAYS)
+    }
+    planned = {entry.get('meal') for day in week.values() for entry in day.values()}
+    alternatives = {}
+    for slot in ("breakfast", "lunch", "dinner"):
+        options = [meal['name'] for meal in _candidates(slot, profile['goal'], dietary_preferences)]
+        alternatives[slot.capitalize()] = [name for name in options if name not in planned][:3] or options[:3]
+    cuisines = dietary_preferences.get('preferred_cuisines') or ["Any"]
+    restrictions = ", ".join(dietary_preferences.get('restrictions') or []) or "your preferences"
+    timing = dietary_preferences.get('meal_timing_preferences') or {}
+
+    return json.dumps({
+        "weekly_meal_plan": week,
+        "shopping_list": _shopping_list(week),
+        "meal_prep_guide": [
+            "Sunday: cook the week's grains and two proteins, wash and chop vegetables",
+            "Sunday: portion Monday-Wednesday lunches and snacks into containers",
+            "Wednesday: cook a second batch of protein and portion Thursday-Sunday meals",
+            "Store cooked meals up to 4 days in the fridge; freeze the rest",
+        ],
+        "alternatives": {slot: options or ["Repeat a favourite meal from this week"] for slot, options in alternatives.items()},
+        "restaurant_guide": {
+            cuisine: f"Pick a grilled or steamed protein with vegetables; check dishes against {restrictions}"
+            for cuisine in cuisines
+        },
+        "supplements": {
+            "Vitamin D3": "1000-2000 IU with breakfast",
+            "Omega-3": "1-2 g with dinner",
+            "Protein powder": f"Only on days below {targets['protein']} g of protein",
+        },
+        "hydration_schedule": {
+            "Daily target": f"{_hydration_liters(profile['weight'], profile['activity_level'])} litres",
+            "On waking": "500 ml",
+            "With each meal": "250-500 ml",
+            "Around training": "500 ml before, sips during, 500 ml after",
+            "Evening": f"Taper after {timing.get('dinner', '19:00')} to protect sleep",
+        },
+        "special_occasions": [
+            "Eat a normal protein-rich meal beforehand rather than saving up calories",
+            "Pick one indulgence and enjoy it without guilt",
+            "Alternate alcoholic drinks with water",
+            "Return to the plan at the next meal",
+        ],
+        "tracking_metrics": [
+            f"Daily calories against the {targets['calories']} kcal target",
+            f"Protein against the {targets['protein']} g target",
+            "Weekly average body weight",
+            "Energy, hunger and sleep quality (1-10)",
+        ],
+        "common_mistakes": [
+            "Not weighing portions for the first few weeks",
+            "Drinking calories from juices, coffees and alcohol",
+            "Letting one off-plan meal turn into an off-plan week",
+            "Too little protein and too few vegetables",
+        ],
+    })
+
+# Local generators by recommendation kind, taking the same inputs as the AI requests
+LOCAL_GENERATORS = {
+    "diet": lambda inputs: local_diet_recommendations(**inputs),
+    "workout": lambda inputs: local_workout_recommendations(**inputs),
+    "personalized_diet_plan": lambda inputs: local_personalized_diet_plan(
+        inputs['profile'], inputs['dietary_preferences']
+    ),
+}
+
+def local_recommendation(kind, inputs):
+    """Generate the rule-based counterpart of an AI request, as a JSON string"""
+    return LOCAL_GENERATORS[kind](inputs)
@@ -0,0 +1,195 @@
+import threading
+import time
+import numpy as np
+from utils import calculate_daily_targets
+from local_recommendations import MEAL_LIBRARY, RESTRICTION_EXCLUDED_TAGS, RESTRICTION_MAX_CARBS
+
+MACROS = ("calories", "protein", "carbs", "fats")
+
+# Serving sizes the solver may suggest for one food
+SERVING_STEPS = np.arange(0.5, 3.01, 0.25)
+
+# Gaps smaller than this are treated as closed
+MIN_GAP_CALORIES = 50
+
+# Relative error is measured against the gap, but never against less than these amounts
+ERROR_FLOORS = np.array([100.0, 10.0, 10.0, 5.0])
+
+# Going over a target costs this many times more than falling short by the same amount
+OVERSHOOT_PENALTY = 4.0
+
+class MealLibraryCatalog:
+    """Meal library foods as NumPy columns: per-serving macros, a tag bitmask and lowercase search text
+
+    This is the optimizer's input, built from local_recommendations.MEAL_LIBRARY
+    (which carries the diet tags the masks need); the searchable per-serving
+    food catalog is food_catalog.FoodCatalogIndex over data/foods.csv.
+    Preference masks are computed with vectorized operations over the whole
+    catalog and memoized per distinct set of preferences.
+    """
+
+    def __init__(self, names, calories, protein, carbs, fats, tags=None, search_text=None):
+        self.names = np.asarray(names)
+        self.macros = np.column_stack([
+            np.asarray(calories, dtype=np.float32),
+            np.asarray(protein, dtype=np.float32),
+            np.asarray(carbs, dtype=np.float32),
+            np.asarray(fats, dtype=np.float32)
+        ])
+        tags = tags if tags is not None else [[] for _ in range(len(self.names))]
+        self.tag_bits = {tag: 1 << index for index, tag in enumerate(sorted({t for row in tags for t in row}))}
+        if len(self.tag_bits) > 64:
+            raise ValueError("MealLibraryCatalog supports at most 64 distinct tags")
+        self.tags = np.array([
+            sum(self.tag_bits[tag] for tag in set(row)) for row in tags
+        ], dtype=np.uint64)
+        self.search_text = np.strings.lower(np.asarray(search_text if search_text is not None else self.names, dtype=str))
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a catalog from dicts with name, calories, protein, carbs, fats and optional tags/ingredients"""
+        records = list(records)
+        return cls(
+            [record['name'] for record in records],
+            [record['calories'] for record in records],
+            [record['protein'] for record in records],
+            [record['carbs'] for record in records],
+            [record['fats'] for record in records],
+            tags=[record.get('tags', []) for record in records],
+            search_text=[" ".join([record['name']] + list(record.get('ingredients', []))) for record in records]
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def _excluded_bits(self, tags):
+        return np.uint64(sum(self.tag_bits.get(tag, 0) for tag in tags))
+
+    def allowed_mask(self, dietary_preferences=None):
+        """Boolean mask of foods compatible with allergies, restrictions and disliked ingredients"""
+        dietary_preferences = dietary_preferences or {}
+        allergies = tuple(sorted(allergy.lower() for allergy in dietary_preferences.get('allergies') or []))
+        restrictions = tuple(sorted(item.lower() for item in dietary_preferences.get('restrictions') or []))
+        disliked = tuple(sorted(
+            item.strip().lower() for item in dietary_preferences.get('disliked_ingredients') or [] if item.strip()
+        ))
+        key = (allergies, restrictions, disliked)
+        with self._lock:
+            mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        excluded = set(allergies)
+        max_carbs = np.inf
+        for restriction in restrictions:
+            excluded |= RESTRICTION_EXCLUDED_TAGS.get(restriction, set())
+            max_carbs = min(max_carbs, RESTRICTION_MAX_CARBS.get(restriction, np.inf))
+        mask = (self.tags & self._excluded_bits(excluded)) == 0
+        if max_carbs < np.inf:
+            mask &= self.macros[:, 2] <= max_carbs
+        for item in disliked:
+            mask &= np.strings.find(self.search_text, item) < 0
+
+        with self._lock:
+            # Only a handful of preference sets are live at once
+            if len(self._masks) >= 128:
+                self._masks.clear()
+            self._masks[key] = mask
+        return mask
+
+def _error(residual, weights):
+    """Weighted squared error of the remaining gap, with overshoot penalized; works on broadcast arrays"""
+    penalty = np.where(residual < 0, OVERSHOOT_PENALTY, 1.0)
+    return (weights * penalty * residual ** 2).sum(axis=-1)
+
+def optimize_meal(catalog, remaining, dietary_preferences=None, max_items=4, candidates=200):
+    """Pick up to max_items foods and servings whose macros best close the remaining gap
+
+    `remaining` is a dict of calories, protein, carbs and fats still to eat.
+    Foods are prescreened by how much a single, optimally scaled serving could
+    reduce the error, then chosen greedily over the discrete serving steps.
+    Returns a list of (catalog index, servings) pairs.
+    """
+    gap = np.maximum(np.array([remaining[macro] for macro in MACROS], dtype=np.float64), 0.0)
+    if gap[0] < MIN_GAP_CALORIES:
+        return []
+    weights = 1.0 / np.maximum(gap, ERROR_FLOORS) ** 2
+
+    allowed = np.flatnonzero(catalog.allowed_mask(dietary_preferences))
+    if not len(allowed):
+        return []
+    macros = catalog.macros[allowed].astype(np.float64)
+
+    # Error reduction of the best continuous scaling of each food on its own
+    projection = macros @ (weights * gap)
+    norm = (macros ** 2) @ weights
+    reduction = np.where(norm > 0, projection ** 2 / np.where(norm > 0, norm, 1.0), 0.0)
+    if len(allowed) > candidates:
+        pool = np.argpartition(-reduction, candidates)[:candidates]
+    else:
+        pool = np.arange(len(allowed))
+    pool = pool[projection[pool] > 0]
+
+    chosen = []
+    residual = gap
+    current = _error(residual, weights)
+    for _ in range(max_items):
+        if not len(pool):
+            break
+        # (foods, serving steps, macros) residuals for every option at once
+        options = residual - SERVING_STEPS[None, :, None] * macros[pool][:, None, :]
+        errors = _error(options, weights)
+        food, step = np.unravel_index(np.argmin(errors), errors.shape)
+        if errors[food, step] >= current * 0.99:
+            break
+        chosen.append((int(allowed[pool[food]]), float(SERVING_STEPS[step])))
+        residual = options[food, step]
+        current = errors[food, step]
+        pool = np.delete(pool, food)
+    return chosen
+
+def remaining_macros(targets, totals):
+    """Get what is left of the daily targets after today's totals"""
+    return {macro: float(targets[macro]) - float(totals.get(macro, 0.0)) for macro in MACROS}
+
+def suggest_meal(profile, totals, dietary_preferences=None, catalog=None, max_items=4):
+    """Suggest foods that close the gap between the profile's daily targets and today's totals
+
+    Returns the suggested items with their macros, the gap before and after
+    eating them, and the solve time in seconds.
+    """
+    started = time.perf_counter()
+    catalog = catalog if catalog is not None else get_default_catalog()
+    targets = calculate_daily_targets(
+        profile['weight'], profile['height'], profile['age'],
+        profile['gender'], profile['activity_level'], profile['goal']
+    )
+    remaining = remaining_macros(targets, totals)
+    items = []
+    for index, servings in optimize_meal(catalog, remaining, dietary_preferences, max_items):
+        item = {'food': str(catalog.names[index]), 'servings': servings}
+        for macro, value in zip(MACROS, catalog.macros[index]):
+            item[macro] = round(float(value) * servings, 1)
+        items.append(item)
+    return {
+        'items': items,
+        'remaining': remaining,
+        'remaining_after': {
+            macro: round(remaining[macro] - sum(item[macro] for item in items), 1) for macro in MACROS
+        },
+        'seconds': time.perf_counter() - started
+    }
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+def get_default_catalog():
+    """Get the process-wide catalog built from the local meal library"""
+    global _default_catalog
+    if _default_catalog is None:
+        with _default_catalog_lock:
+            if _default_catalog is None:
+                _default_catalog = MealLibraryCatalog.from_records(MEAL_LIBRARY)
+    return _default_catalog
@@ -0,0 +1,221 @@
+from sqlalchemy import inspect, text, func, select, Column, Integer, DateTime, MetaData, Table
+from sqlalchemy.exc import DBAPIError
+from datetime import datetime, timedelta
+
+# Bookkeeping table recording every applied schema version
+_version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+# Arbitrary key for the PostgreSQL advisory lock serializing concurrent upgrades
+_ADVISORY_LOCK_KEY = 71_500_301
+
+def _create_base_tables(conn, metadata):
+    """Create the original food, weight and preference tables if missing"""
+    tables = [metadata.tables[name] for name in ('food_log', 'weight_log', 'dietary_preferences')]
+    metadata.create_all(conn, tables=tables, checkfirst=True)
+
+def _add_date_indexes(conn, metadata):
+    """Add (date, id) indexes matching the date filter/order access paths"""
+    for table_name in ('food_log', 'weight_log'):
+        for index in metadata.tables[table_name].indexes:
+            if index.name == f'ix_{table_name}_date_id':
+                index.create(conn, checkfirst=True)
+
+def rebuild_daily_summary(conn, metadata, start_date=None, end_date=None):
+    """Recompute daily_nutrition_summary rows from food_log, optionally for a date range
+
+    Returns the number of days written.
+    """
+    summary = metadata.tables['daily_nutrition_summary']
+    food_log = metadata.tables['food_log']
+
+    delete = summary.delete()
+    totals = select(
+        food_log.c.date,
+        func.sum(food_log.c.calories),
+        func.sum(food_log.c.protein),
+        func.sum(food_log.c.carbs),
+        func.sum(food_log.c.fats),
+        func.count(food_log.c.id)
+    ).group_by(food_log.c.date)
+    if start_date is not None:
+        delete = delete.where(summary.c.date >= start_date)
+        totals = totals.where(food_log.c.date >= start_date)
+    if end_date is not None:
+        delete = delete.where(summary.c.date <= end_date)
+        totals = totals.where(food_log.c.date <= end_date)
+
+    conn.execute(delete)
+    result = conn.execute(summary.insert().from_select(
+        ['date', 'calories', 'protein', 'carbs', 'fats', 'entry_count'], totals
+    ))
+    return result.rowcount
+
+def food_frequency_key(food):
+    """Normalize a food name into its quick-add index key"""
+    return " ".join(food.lower().split())
+
+def food_frequency_last_used(day, now):
+    """Timestamp ordering a food in the quick-add index: now for today's entries, else the start of their day"""
+    return now if day == now.date() else datetime.combine(day, datetime.min.time())
+
+def rebuild_food_frequency(conn, metadata, batch_size=1000):
+    """Recompute the food_frequency quick-add index from food_log
+
+    Rows are streamed oldest first, so each key keeps the macros of its most
+    recent entry. Returns the number of distinct foods written.
+    """
+    frequency = metadata.tables['food_frequency']
+    food_log = metadata.tables['food_log']
+
+    now = datetime.now()
+    foods = {}
+    logged_today = {}
+    rows = conn.execution_options(stream_results=True, yield_per=batch_size).execute(select(
+        food_log.c.id, food_log.c.date, food_log.c.food, food_log.c.calories,
+        food_log.c.protein, food_log.c.carbs, food_log.c.fats
+    ).order_by(food_log.c.date, food_log.c.id))
+    for entry_id, day, food, calories, protein, carbs, fats in rows:
+        key = food_frequency_key(food)
+        uses = foods[key]['uses'] + 1 if key in foods else 1
+        foods[key] = {
+            'key': key,
+            'food': " ".join(food.split()),
+            'calories': calories,
+            'protein': protein,
+            'carbs': carbs,
+            'fats': fats,
+            'uses': uses,
+            'last_used': food_frequency_last_used(day, now)
+        }
+        if day == now.date():
+            logged_today[key] = entry_id
+
+    # Writes stamp today's foods with the time they were logged; food_log has no
+    # time of day, so keep their log order instead, the latest ending at now
+    for rank, key in enumerate(sorted(logged_today, key=logged_today.get, reverse=True)):
+        foods[key]['last_used'] = now - timedelta(microseconds=rank)
+
+    conn.execute(frequency.delete())
+    if foods:
+        conn.execute(frequency.insert(), list(foods.values()))
+    return len(foods)
+
+def _create_daily_summary(conn, metadata):
+    """Create the daily_nutrition_summary rollup and backfill it from food_log"""
+    metadata.create_all(conn, tables=[metadata.tables['daily_nutrition_summary']], checkfirst=True)
+    rebuild_daily_summary(conn, metadata)
+
+def _create_recommendation_cache(conn, metadata):
+    """Create the recommendation_cache table backing the AI response cache"""
+    metadata.create_all(conn, tables=[metadata.tables['recommendation_cache']], checkfirst=True)
+
+def _create_recommendation_jobs(conn, metadata):
+    """Create the recommendation_jobs table backing background plan generation"""
+    metadata.create_all(conn, tables=[metadata.tables['recommendation_jobs']], checkfirst=True)
+
+def _add_recommendation_cache_inputs(conn, metadata):
+    """Store each cached response's prompt inputs for the similar-plan index"""
+    # Databases created after this column joined the model already have it
+    if 'inputs' in {column['name'] for column in inspect(conn).get_columns('recommendation_cache')}:
+        return
+    column = metadata.tables['recommendation_cache'].c.inputs
+    conn.execute(text(
+        f"ALTER TABLE recommendation_cache ADD COLUMN inputs {column.type.compile(dialect=conn.dialect)}"
+    ))
+
+def _create_pregenerated_recommendations(conn, metadata):
+    """Create the pregenerated_recommendations table filled by pregenerate.py"""
+    metadata.create_all(conn, tables=[metadata.tables['pregenerated_recommendations']], checkfirst=True)
+
+def _create_food_frequency(conn, metadata):
+    """Create the food_frequency quick-add index and backfill it from food_log"""
+    metadata.create_all(conn, tables=[metadata.tables['food_frequency']], checkfirst=True)
+    rebuild_food_frequency(conn, metadata)
+
+def _create_profiles(conn, metadata):
+    """Create the profiles table replacing per-session profile state"""
+    metadata.create_all(conn, tables=[metadata.tables['profiles']], checkfirst=True)
+
+def _add_recommendation_jobs_index(conn, metadata):
+    """Index recommendation_jobs by (status, updated_at) for expiring and pruning jobs"""
+    for index in metadata.tables['recommendation_jobs'].indexes:
+        index.create(conn, checkfirst=True)
+
+# Ordered list of (version, description, step); append new steps, never reorder
+MIGRATIONS = [
+    (1, "create base tables", _create_base_tables),
+    (2, "add (date, id) indexes on food_log and weight_log", _add_date_indexes),
+    (3, "create and backfill daily_nutrition_summary", _create_daily_summary),
+    (4, "create recommendation_cache", _create_recommendation_cache),
+    (5, "create recommendation_jobs", _create_recommendation_jobs),
+    (6, "add inputs to recommendation_cache", _add_recommendation_cache_inputs),
+    (7, "create pregenerated_recommendations", _create_pregenerated_recommendations),
+    (8, "create and backfill food_frequency", _create_food_frequency),
+    (9, "create profiles", _create_profiles),
+    (10, "add (status, updated_at) index on recommendation_jobs", _add_recommendation_jobs_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_current_version(engine):
+    """Get the applied schema version with a single query (0 for a fresh database)"""
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    except DBAPIError:
+        return 0
+    return version or 0
+
+def upgrade(engine, metadata):
+    """Apply all pending migrations, returning the resulting schema version"""
+    with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': _ADVISORY_LOCK_KEY})
+        _version_metadata.create_all(conn, checkfirst=True)
+
+        current = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(conn, metadata)
+            conn.execute(schema_version.insert().values(version=version, applied_at=datetime.utcnow()))
+            current = version
+    return current
+
+def ensure_schema(engine, metadata):
+    """Check the schema version once and upgrade only when it is behind"""
+    if get_current_version(engine) >= LATEST_VERSION:
+        return LATEST_VERSION
+    return upgrade(engine, metadata)
+
+if __name__ == "__main__":
+    import argparse
+    from data_manager import Base, get_engine
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations and repair derived tables")
+    parser.add_argument('--rebuild-summary', action='store_true',
+                        help="recompute daily_nutrition_summary from food_log")
+    parser.add_argument('--rebuild-food-frequency', action='store_true',
+                        help="recompute the food_frequency quick-add index from food_log")
+    parser.add_argument('--start', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        help="first day to rebuild (YYYY-MM-DD)")
+    parser.add_argument('--end', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        help="last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    # get_engine() applies pending migrations, so this doubles as a pre-deploy upgrade step
+    engine = get_engine()
+    print(f"Schema version: {get_current_version(engine)} (latest {LATEST_VERSION})")
+    if args.rebuild_summary:
+        with engine.begin() as conn:
+            days = rebuild_daily_summary(conn, Base.metadata, args.start, args.end)
+        print(f"Rebuilt daily_nutrition_summary for {days} day(s)")
+    if args.rebuild_food_frequency:
+        with engine.begin() as conn:
+            foods = rebuild_food_frequency(conn, Base.metadata)
+        print(f"Rebuilt food_frequency for {foods} food(s)")
@@ -0,0 +1,196 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from rate_limiter import get_rate_limiter, DEFAULT_PRIORITY
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+_metrics = {
+    'calls': 0,
+    'successes': 0,
+    'failures': 0,
+    'retries': 0,
+    'latency_total': 0.0,
+    'latency_max': 0.0
+}
+_metrics_lock = threading.Lock()
+
+def _settings():
+    """Read client settings from the environment"""
+    return {
+        'timeout': float(os.environ.get('OPENAI_TIMEOUT_SECONDS', 60)),
+        'connect_timeout': float(os.environ.get('OPENAI_CONNECT_TIMEOUT_SECONDS', 5)),
+        'max_retries': int(os.environ.get('OPENAI_MAX_RETRIES', 3)),
+        'backoff_base': float(os.environ.get('OPENAI_BACKOFF_BASE_SECONDS', 0.5)),
+        'backoff_max': float(os.environ.get('OPENAI_BACKOFF_MAX_SECONDS', 8)),
+        'max_connections': int(os.environ.get('OPENAI_MAX_CONNECTIONS', 20)),
+        'deadline': float(os.environ.get('OPENAI_DEADLINE_SECONDS', 120))
+    }
+
+# openai and httpx are imported on first use: together they take most of a second to
+# load, and pages without AI features (or processes without an API key) never need them
+
+def _http_options(settings):
+    import httpx
+
+    return {
+        'timeout': httpx.Timeout(settings['timeout'], connect=settings['connect_timeout']),
+        'limits': httpx.Limits(
+            max_connections=settings['max_connections'],
+            max_keepalive_connections=settings['max_connections']
+        )
+    }
+
+def get_openai_client():
+    """Get the process-wide OpenAI client, or None if no API key is set
+
+    The client keeps a keep-alive HTTP connection pool shared by every session.
+    SDK retries are disabled; call_with_retries applies the retry policy instead.
+    """
+    global _client, _client_key
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    if _client is not None and _client_key == api_key:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            import httpx
+            from openai import OpenAI
+
+            settings = _settings()
+            _client = OpenAI(
+                api_key=api_key,
+                max_retries=0,
+                http_client=httpx.Client(**_http_options(settings))
+            )
+            _client_key = api_key
+    return _client
+
+def create_async_openai_client():
+    """Create an async OpenAI client with the configured timeouts, or None if no API key is set
+
+    Async HTTP pools are bound to the event loop that created them, so callers
+    create one per loop and close it when done.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    import httpx
+    from openai import AsyncOpenAI
+
+    settings = _settings()
+    return AsyncOpenAI(
+        api_key=api_key,
+        max_retries=0,
+        http_client=httpx.AsyncClient(**_http_options(settings))
+    )
+
+def _is_retryable(error):
+    """429s, 5xx responses, timeouts and connection failures are worth retrying"""
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _backoff_delay(attempt, settings):
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]"""
+    return random.uniform(0, min(settings['backoff_max'], settings['backoff_base'] * (2 ** attempt)))
+
+def _record(name, amount=1):
+    with _metrics_lock:
+        _metrics[name] += amount
+
+def _record_latency(seconds):
+    with _metrics_lock:
+        _metrics['latency_total'] += seconds
+        _metrics['latency_max'] = max(_metrics['latency_max'], seconds)
+
+def _deadline(deadline_seconds, settings):
+    """Absolute monotonic deadline for a call, or None when unbounded"""
+    seconds = settings['deadline'] if deadline_seconds is None else deadline_seconds
+    return time.monotonic() + seconds if seconds else None
+
+def _attempt_timeout(deadline, settings):
+    """Per-attempt timeout: the configured timeout, capped by what is left of the deadline"""
+    if deadline is None:
+        return settings['timeout']
+    return max(0.0, min(settings['timeout'], deadline - time.monotonic()))
+
+def _remaining(deadline):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def call_with_retries(create, deadline_seconds=None, rate_limit=None, **kwargs):
+    """Call an OpenAI SDK method, retrying retryable errors with jittered exponential backoff
+
+    `deadline_seconds` (default OPENAI_DEADLINE_SECONDS, 0 for none) bounds the
+    whole call including rate-limit queueing, retries and backoff waits.
+    `rate_limit` is an optional (estimated_tokens, priority) pair; each attempt
+    then waits for budget from the process-wide rate limiter.
+    """
+    settings = _settings()
+    deadline = _deadline(deadline_seconds, settings)
+    tokens, priority = rate_limit or (0, DEFAULT_PRIORITY)
+    _record('calls')
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            if rate_limit:
+                get_rate_limiter().acquire(tokens, priority, timeout=_remaining(deadline))
+            result = create(timeout=_attempt_timeout(deadline, settings), **kwargs)
+            _record('successes')
+            _record_latency(time.perf_counter() - started)
+            return result
+        except Exception as e:
+            delay = _backoff_delay(attempt, settings)
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if not _is_retryable(e) or attempt >= settings['max_retries'] or out_of_time:
+                _record('failures')
+                _record_latency(time.perf_counter() - started)
+                raise
+        attempt += 1
+        _record('retries')
+        time.sleep(delay)
+
+async def call_with_retries_async(create, deadline_seconds=None, rate_limit=None, **kwargs):
+    """Async counterpart of call_with_retries"""
+    settings = _settings()
+    deadline = _deadline(deadline_seconds, settings)
+    tokens, priority = rate_limit or (0, DEFAULT_PRIORITY)
+    _record('calls')
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            if rate_limit:
+                await asyncio.to_thread(
+                    get_rate_limiter().acquire, tokens, priority, _remaining(deadline)
+                )
+            result = await create(timeout=_attempt_timeout(deadline, settings), **kwargs)
+            _record('successes')
+            _record_latency(time.perf_counter() - started)
+            return result
+        except Exception as e:
+            delay = _backoff_delay(attempt, settings)
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if not _is_retryable(e) or attempt >= settings['max_retries'] or out_of_time:
+                _record('failures')
+                _record_latency(time.perf_counter() - started)
+                raise
+        attempt += 1
+        _record('retries')
+        await asyncio.sleep(delay)
+
+def get_openai_metrics():
+    """Get call, retry, failure and latency counters for OpenAI requests in this process"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    finished = metrics['successes'] + metrics['failures']
+    metrics['latency_avg'] = metrics['latency_total'] / finished if finished else 0.0
+    return metrics
@@ -0,0 +1,97 @@
+import argparse
+import json
+import random
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prompts end with "Format the response as JSON with these keys: a, b, c"
+KEYS_PATTERN = re.compile(r"JSON with these keys:\s*(.+)", re.DOTALL)
+
+def stub_content(prompt):
+    """Build a JSON document with a placeholder value for every key the prompt asks for"""
+    match = KEYS_PATTERN.search(prompt)
+    keys = [key.strip() for key in re.split(r"[,\s]+", match.group(1)) if key.strip()] if match else ["response"]
+    return json.dumps({key: f"Stub {key.replace('_', ' ')}" for key in keys})
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers POST .../chat/completions like the OpenAI API, streaming or not"""
+    latency = 0.0
+    error_rate = 0.0
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self._send_json(500, {"error": {"message": "Stub server error", "type": "server_error"}})
+            return
+
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        content = stub_content(prompt)
+        completion = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": body.get('model', 'stub')
+        }
+        if body.get('stream'):
+            self._send_stream(completion, content)
+            return
+        self._send_json(200, dict(completion, object="chat.completion", choices=[{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }], usage={"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                   "total_tokens": (len(prompt) + len(content)) // 4}))
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, completion, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        for index, piece in enumerate(pieces):
+            chunk = dict(completion, object="chat.completion.chunk", choices=[{
+                "index": 0,
+                "delta": {"content": piece},
+                "finish_reason": "stop" if index == len(pieces) - 1 else None
+            }])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host="127.0.0.1", port=8765, latency=0.0, error_rate=0.0):
+    """Create a threaded stub server; call serve_forever() (or run it in a thread)"""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'latency': latency, 'error_rate': error_rate})
+    return ThreadingHTTPServer((host, port), handler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the OpenAI chat completions API. Point the app at it with "
+                    "OPENAI_BASE_URL=http://HOST:PORT/v1 and any OPENAI_API_KEY."
+    )
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with a 500")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.error_rate)
+    print(f"OpenAI stub listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+import time
+from ai_recommendations import MODEL, REQUEST_BUILDERS
+from openai_client import create_async_openai_client, call_with_retries_async
+from rate_limiter import estimate_tokens, PRIORITIES, DEFAULT_PRIORITY
+from recommendation_cache import make_cache_key
+from recommendation_grid import GRID_KINDS, iter_grid, get_pregenerated_store
+
+def pending_cells(kinds=GRID_KINDS, model=MODEL):
+    """Get the grid cells not yet in the store, so an interrupted run resumes where it stopped"""
+    done = get_pregenerated_store().keys()
+    return [
+        (kind, inputs) for kind, inputs in iter_grid(kinds)
+        if make_cache_key(kind, inputs, model) not in done
+    ]
+
+async def _generate_cell(client, store, kind, inputs):
+    """Generate and store one cell; returns None on success or the error message"""
+    _, _, prompt, _ = REQUEST_BUILDERS[kind](**inputs)
+    try:
+        response = await call_with_retries_async(
+            client.chat.completions.create,
+            rate_limit=(estimate_tokens(kind, prompt), PRIORITIES.get(kind, DEFAULT_PRIORITY)),
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+        json.loads(content)
+    except Exception as e:
+        return str(e)
+    await asyncio.to_thread(store.put, kind, inputs, MODEL, content)
+    return None
+
+async def pregenerate(kinds=GRID_KINDS, concurrency=8, limit=None, progress_every=25):
+    """Generate every missing grid cell with at most `concurrency` requests in flight
+
+    Each result is stored as soon as it arrives. Returns a summary dict with
+    generated and failed counts, the failures and rows per second.
+    """
+    store = get_pregenerated_store()
+    cells = await asyncio.to_thread(pending_cells, kinds)
+    if limit:
+        cells = cells[:limit]
+    summary = {'pending': len(cells), 'generated': 0, 'failed': 0, 'errors': []}
+    started = time.perf_counter()
+    if not cells:
+        summary['seconds'] = 0.0
+        summary['cells_per_sec'] = 0.0
+        return summary
+
+    client = create_async_openai_client()
+    if client is None:
+        raise SystemExit("OPENAI_API_KEY is not set")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(kind, inputs):
+        async with semaphore:
+            error = await _generate_cell(client, store, kind, inputs)
+        if error is None:
+            summary['generated'] += 1
+        else:
+            summary['failed'] += 1
+            summary['errors'].append((kind, inputs, error))
+        finished = summary['generated'] + summary['failed']
+        if progress_every and finished % progress_every == 0:
+            print(f"{finished}/{len(cells)} cells, {summary['failed']} failed, "
+                  f"{finished / (time.perf_counter() - started):.1f} cells/s", flush=True)
+
+    try:
+        await asyncio.gather(*(run(kind, inputs) for kind, inputs in cells))
+    finally:
+        await client.close()
+        summary['seconds'] = time.perf_counter() - started
+        summary['cells_per_sec'] = (summary['generated'] + summary['failed']) / summary['seconds']
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pregenerate diet and workout recommendations for the profile grid"
+    )
+    parser.add_argument('--kinds', nargs='+', choices=GRID_KINDS, default=list(GRID_KINDS),
+                        help="recommendation kinds to generate")
+    parser.add_argument('--concurrency', type=int, default=8, help="maximum requests in flight")
+    parser.add_argument('--limit', type=int, help="generate at most this many cells")
+    parser.add_argument('--dry-run', action='store_true', help="only report how many cells are missing")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        total = sum(1 for _ in iter_grid(args.kinds))
+        print(f"{len(pending_cells(args.kinds))} of {total} grid cells missing")
+        raise SystemExit(0)
+
+    try:
+        result = asyncio.run(pregenerate(args.kinds, args.concurrency, args.limit))
+    except KeyboardInterrupt:
+        raise SystemExit("Interrupted; finished cells are stored, rerun to resume")
+    for kind, inputs, error in result['errors'][:10]:
+        print(f"failed {kind} {inputs}: {error}")
+    print(f"Generated {result['generated']} cell(s), {result['failed']} failed, "
+          f"in {result['seconds']:.1f}s ({result['cells_per_sec']:.1f} cells/s)")
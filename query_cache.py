@@ -0,0 +1,101 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_ENTRIES = 1024
+
+class QueryCache:
+    """In-process read-through cache of DataManager query results
+
+    Each scope (one user's data) has a write-version counter. Results are
+    stored with the version current when their query started and only served
+    while it is unchanged, so a write bumping the version invalidates every
+    cached read of that scope at once, including reads racing the write.
+    The TTL bounds how long writes made by other processes can stay unseen.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get('DB_QUERY_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get('DB_QUERY_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def version(self, scope):
+        """Get the current write version of a scope"""
+        with self._lock:
+            return self._versions.get(scope, 0)
+
+    def bump(self, scope):
+        """Invalidate every cached read of a scope; call after its writes commit"""
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def get_or_load(self, scope, key, loader):
+        """Get a cached result for (scope, key), or run loader() and cache what it returns
+
+        Callers get a copy, so mutating a result never changes the cache.
+        """
+        if not self.enabled:
+            return loader()
+        cache_key = (scope, key)
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(scope, 0)
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] == version and now - entry[1] < self.ttl:
+                self._entries.move_to_end(cache_key)
+                self._stats['hits'] += 1
+                value = entry[2]
+            else:
+                self._stats['misses'] += 1
+                value = None
+                entry = None
+        if entry:
+            return copy.deepcopy(value)
+
+        value = loader()
+        with self._lock:
+            self._entries[cache_key] = (version, now, copy.deepcopy(value))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return value
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get hit/miss/invalidation counters and the number of cached results"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+def get_query_cache():
+    """Get the process-wide query cache shared by every DataManager"""
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = QueryCache()
+    return _query_cache
@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+# Lower numbers are served first: quick workout suggestions shouldn't queue
+# behind long weekly plan generations
+PRIORITIES = {
+    "workout": 0,
+    "diet": 1,
+    "personalized_diet_plan": 2
+}
+DEFAULT_PRIORITY = 1
+
+# Rough completion sizes used to reserve tokens-per-minute budget up front
+EXPECTED_COMPLETION_TOKENS = {
+    "workout": 1500,
+    "diet": 1500,
+    "personalized_diet_plan": 4000
+}
+
+class RateLimitTimeout(Exception):
+    """Raised when a request cannot get rate-limit budget before its deadline"""
+
+def estimate_tokens(kind, prompt):
+    """Estimate the tokens a request will use (about 4 characters per prompt token)"""
+    return len(prompt) // 4 + EXPECTED_COMPLETION_TOKENS.get(kind, 1500)
+
+class _MemoryBuckets:
+    """Requests and tokens buckets held in process memory"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.rates = (requests_per_minute / 60.0, tokens_per_minute / 60.0)
+        self.capacity = (float(requests_per_minute), float(tokens_per_minute))
+        self.state = {'requests': self.capacity[0], 'tokens': self.capacity[1], 'updated': time.monotonic()}
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state['updated'])
+        state['requests'] = min(self.capacity[0], state['requests'] + elapsed * self.rates[0])
+        state['tokens'] = min(self.capacity[1], state['tokens'] + elapsed * self.rates[1])
+        state['updated'] = now
+
+    def _try_consume(self, state, tokens, now):
+        self._refill(state, now)
+        # A request larger than the whole bucket is admitted once the bucket is full
+        tokens = min(tokens, self.capacity[1])
+        if state['requests'] >= 1 and state['tokens'] >= tokens:
+            state['requests'] -= 1
+            state['tokens'] -= tokens
+            return 0.0
+        return max(
+            (1 - state['requests']) / self.rates[0] if state['requests'] < 1 else 0.0,
+            (tokens - state['tokens']) / self.rates[1] if state['tokens'] < tokens else 0.0
+        )
+
+    def try_consume(self, tokens):
+        """Take one request and `tokens` tokens, or return the seconds to wait until possible"""
+        return self._try_consume(self.state, tokens, time.monotonic())
+
+class _FileBuckets(_MemoryBuckets):
+    """Buckets stored in a JSON file under an exclusive flock, shared by local processes"""
+
+    def __init__(self, path, requests_per_minute, tokens_per_minute):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.path = path
+
+    def try_consume(self, tokens):
+        import fcntl
+
+        with open(self.path, 'a+') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                content = handle.read()
+                now = time.time()
+                state = json.loads(content) if content.strip() else {
+                    'requests': self.capacity[0], 'tokens': self.capacity[1], 'updated': now
+                }
+                wait = self._try_consume(state, tokens, now)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+                return wait
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+class RateLimiter:
+    """Token-bucket limiter on requests/min and tokens/min with a priority wait queue
+
+    Callers block in acquire() until both buckets can cover the request and no
+    higher-priority (or earlier equal-priority) caller is waiting. With
+    AI_RATE_LIMIT_STATE_FILE set, the buckets are shared by every process on
+    the host through a locked state file; the queue order is per process.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, state_file=None):
+        requests_per_minute = requests_per_minute or float(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', 500))
+        tokens_per_minute = tokens_per_minute or float(os.environ.get('OPENAI_TOKENS_PER_MINUTE', 30000))
+        state_file = state_file or os.environ.get('AI_RATE_LIMIT_STATE_FILE')
+        if state_file:
+            self.buckets = _FileBuckets(state_file, requests_per_minute, tokens_per_minute)
+        else:
+            self.buckets = _MemoryBuckets(requests_per_minute, tokens_per_minute)
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._stats = {
+            'acquired': 0,
+            'timeouts': 0,
+            'max_queue_depth': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'wait_by_priority': {}
+        }
+
+    def acquire(self, tokens, priority=DEFAULT_PRIORITY, timeout=None):
+        """Wait for budget for one request of `tokens` tokens; returns the seconds waited
+
+        Raises RateLimitTimeout if budget is not available within `timeout` seconds.
+        """
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._queue))
+            try:
+                while True:
+                    wait = 0.05
+                    if self._queue[0] == ticket:
+                        wait = self.buckets.try_consume(tokens)
+                        if wait == 0:
+                            break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise RateLimitTimeout("Timed out waiting for OpenAI rate limit budget")
+                        wait = min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+            waited = time.monotonic() - started
+            self._record_wait(priority, waited)
+        return waited
+
+    def _record_wait(self, priority, waited):
+        self._stats['acquired'] += 1
+        self._stats['wait_total'] += waited
+        self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+        count, total = self._stats['wait_by_priority'].get(priority, (0, 0.0))
+        self._stats['wait_by_priority'][priority] = (count + 1, total + waited)
+
+    def stats(self):
+        """Get current queue depth plus wait-time and throughput counters"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+            stats['wait_by_priority'] = {
+                priority: total / count for priority, (count, total) in self._stats['wait_by_priority'].items()
+            }
+        stats['wait_avg'] = stats['wait_total'] / stats['acquired'] if stats['acquired'] else 0.0
+        return stats
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Get the process-wide OpenAI rate limiter"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
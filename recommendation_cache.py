@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.exc import IntegrityError
+from data_manager import get_engine, RecommendationCacheEntry
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+def _normalize(value):
+    """Normalize prompt inputs so equivalent profiles produce the same cache key"""
+    if isinstance(value, dict):
+        return {str(key).strip().lower(): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_normalize(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    return str(value)
+
+def make_cache_key(kind, inputs, model="gpt-4o"):
+    """Build a stable SHA-256 key from the request kind, model and normalized prompt inputs"""
+    payload = json.dumps(
+        {'kind': kind, 'model': model, 'inputs': _normalize(inputs)},
+        sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class RecommendationCache:
+    """Database-backed response cache with a TTL and least-recently-used eviction
+
+    Entries live in the recommendation_cache table so every process and replica
+    shares them. Hit/miss counters are per process.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self.ttl = timedelta(seconds=ttl_seconds if ttl_seconds is not None else int(
+            os.environ.get('AI_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)))
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get('AI_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.table = RecommendationCacheEntry.__table__
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        """Get a cached response, or None when missing or expired"""
+        now = datetime.utcnow()
+        try:
+            with get_engine().begin() as conn:
+                row = conn.execute(
+                    select(self.table.c.response, self.table.c.created_at).where(self.table.c.key == key)
+                ).first()
+                if row and row.created_at >= now - self.ttl:
+                    conn.execute(
+                        update(self.table).where(self.table.c.key == key).values(
+                            last_accessed=now, hits=self.table.c.hits + 1
+                        )
+                    )
+                    self._count('hits')
+                    return row.response
+                if row:
+                    conn.execute(delete(self.table).where(self.table.c.key == key))
+        except Exception:
+            self._count('errors')
+        self._count('misses')
+        return None
+
+    def put(self, key, kind, response, inputs=None):
+        """Store a response and evict expired and least recently used entries
+
+        `inputs` are the normalized prompt inputs, kept for the similar-plan index.
+        """
+        now = datetime.utcnow()
+        values = {
+            'kind': kind, 'response': response, 'created_at': now, 'last_accessed': now,
+            'inputs': _normalize(inputs) if inputs is not None else None
+        }
+        try:
+            try:
+                with get_engine().begin() as conn:
+                    conn.execute(self.table.insert().values(key=key, hits=0, **values))
+            except IntegrityError:
+                with get_engine().begin() as conn:
+                    conn.execute(update(self.table).where(self.table.c.key == key).values(**values))
+            self._count('stores')
+            self._evict(now)
+        except Exception:
+            self._count('errors')
+
+    def _evict(self, now):
+        with get_engine().begin() as conn:
+            evicted = conn.execute(
+                delete(self.table).where(self.table.c.created_at < now - self.ttl)
+            ).rowcount or 0
+            count = conn.execute(select(func.count()).select_from(self.table)).scalar()
+            if count > self.max_entries:
+                stale = select(self.table.c.key).order_by(
+                    self.table.c.last_accessed.desc()
+                ).offset(self.max_entries)
+                evicted += conn.execute(
+                    delete(self.table).where(self.table.c.key.in_(stale.scalar_subquery()))
+                ).rowcount or 0
+        if evicted:
+            self._count('evictions', evicted)
+
+    def clear(self):
+        """Remove every cached response"""
+        with get_engine().begin() as conn:
+            conn.execute(delete(self.table))
+
+    def stats(self):
+        """Get hit/miss/store/eviction counters and the hit rate for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_recommendation_cache():
+    """Get the process-wide recommendation cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RecommendationCache()
+    return _cache
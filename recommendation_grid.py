@@ -0,0 +1,150 @@
+import itertools
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from data_manager import get_engine, PregeneratedRecommendation
+from recommendation_cache import make_cache_key
+from utils import ACTIVITY_MULTIPLIERS, MACRO_SPLITS
+
+GOALS = tuple(MACRO_SPLITS)
+ACTIVITY_LEVELS = tuple(ACTIVITY_MULTIPLIERS)
+FITNESS_LEVELS = ("Beginner", "Intermediate", "Advanced")
+GENDERS = ("Male", "Female")
+
+# Bucket centres; a profile maps to the nearest centre within the tolerance
+AGE_BUCKETS = (25, 35, 45, 55, 65)
+WEIGHT_BUCKETS = (55, 65, 75, 85, 95, 105, 115)
+HEIGHT_BUCKETS = (155, 165, 175, 185)
+BUCKET_TOLERANCE = 5
+
+# Kinds covered by the grid; personalized plans depend on free-form preferences
+GRID_KINDS = ("diet", "workout")
+
+def _bucket(value, centres):
+    """Get the nearest bucket centre within BUCKET_TOLERANCE, or None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    nearest = min(centres, key=lambda centre: abs(centre - value))
+    return nearest if abs(nearest - value) <= BUCKET_TOLERANCE else None
+
+def grid_inputs(kind, inputs):
+    """Map request inputs to the grid cell covering them, or None if outside the grid"""
+    if kind == "diet":
+        if inputs.get('gender') not in GENDERS or inputs.get('activity_level') not in ACTIVITY_LEVELS \
+                or inputs.get('goal') not in GOALS:
+            return None
+        cell = {
+            'age': _bucket(inputs.get('age'), AGE_BUCKETS),
+            'weight': _bucket(inputs.get('weight'), WEIGHT_BUCKETS),
+            'height': _bucket(inputs.get('height'), HEIGHT_BUCKETS),
+            'gender': inputs['gender'],
+            'activity_level': inputs['activity_level'],
+            'goal': inputs['goal']
+        }
+    elif kind == "workout":
+        # Medical conditions change the advice, so only the no-conditions case is pregenerated
+        if inputs.get('fitness_level') not in FITNESS_LEVELS or inputs.get('goal') not in GOALS \
+                or (inputs.get('medical_conditions') or "None") != "None":
+            return None
+        cell = {
+            'age': _bucket(inputs.get('age'), AGE_BUCKETS),
+            'fitness_level': inputs['fitness_level'],
+            'goal': inputs['goal'],
+            'medical_conditions': "None"
+        }
+    else:
+        return None
+    return None if None in cell.values() else cell
+
+def iter_grid(kinds=GRID_KINDS):
+    """Yield (kind, inputs) for every grid cell of the given kinds"""
+    if "diet" in kinds:
+        for age, weight, height, gender, activity_level, goal in itertools.product(
+                AGE_BUCKETS, WEIGHT_BUCKETS, HEIGHT_BUCKETS, GENDERS, ACTIVITY_LEVELS, GOALS):
+            yield "diet", {
+                'age': age, 'weight': weight, 'height': height, 'gender': gender,
+                'activity_level': activity_level, 'goal': goal
+            }
+    if "workout" in kinds:
+        for age, fitness_level, goal in itertools.product(AGE_BUCKETS, FITNESS_LEVELS, GOALS):
+            yield "workout", {
+                'age': age, 'fitness_level': fitness_level, 'goal': goal, 'medical_conditions': "None"
+            }
+
+class PregeneratedStore:
+    """Recommendations generated offline for the profile grid, read before any AI call
+
+    Entries never expire; rerun pregenerate.py after changing the model or
+    prompts. Set AI_USE_PREGENERATED=false to bypass the store.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = enabled if enabled is not None else \
+            os.environ.get('AI_USE_PREGENERATED', 'true').lower() in ('1', 'true', 'yes')
+        self.table = PregeneratedRecommendation.__table__
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'outside_grid': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, kind, inputs, model):
+        """Get the stored response for the grid cell covering the inputs, or None"""
+        if not self.enabled:
+            return None
+        cell = grid_inputs(kind, inputs)
+        if cell is None:
+            self._count('outside_grid')
+            return None
+        try:
+            with get_engine().connect() as conn:
+                response = conn.execute(select(self.table.c.response).where(
+                    self.table.c.key == make_cache_key(kind, cell, model)
+                )).scalar()
+        except Exception:
+            response = None
+        self._count('hits' if response is not None else 'misses')
+        return response
+
+    def put(self, kind, inputs, model, response):
+        """Store the response for a grid cell, replacing any earlier one"""
+        values = {
+            'kind': kind, 'inputs': inputs, 'response': response, 'created_at': datetime.utcnow()
+        }
+        key = make_cache_key(kind, inputs, model)
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(self.table.insert().values(key=key, **values))
+        except IntegrityError:
+            with get_engine().begin() as conn:
+                conn.execute(update(self.table).where(self.table.c.key == key).values(**values))
+
+    def keys(self):
+        """Get the keys of every stored cell"""
+        with get_engine().connect() as conn:
+            return set(conn.execute(select(self.table.c.key)).scalars())
+
+    def stats(self):
+        """Get hit/miss counters for this process and the hit rate of in-grid lookups"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_pregenerated_store():
+    """Get the process-wide pregenerated recommendation store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PregeneratedStore()
+    return _store
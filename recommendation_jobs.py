@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, update
+from data_manager import get_engine, RecommendationJob
+from ai_recommendations import (
+    get_diet_recommendations, get_workout_recommendations, get_personalized_diet_plan
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+UNFINISHED_STATUSES = (QUEUED, RUNNING)
+
+# Finished jobs are kept this long for polling, then deleted
+DEFAULT_RETENTION_SECONDS = 24 * 3600
+
+# Finished jobs never change, so this many are kept in memory to serve reruns without a query
+FINISHED_JOB_CACHE_SIZE = 256
+
+STALE_JOB_ERROR = ("The plan generation stopped responding, most likely because the server "
+                   "running it restarted. Please try again.")
+
+# Job kinds and the generation function each one runs with the job's params
+JOB_FUNCTIONS = {
+    "diet": lambda params: get_diet_recommendations(
+        params['age'], params['weight'], params['height'],
+        params['gender'], params['activity_level'], params['goal']
+    ),
+    "workout": lambda params: get_workout_recommendations(
+        params['age'], params['fitness_level'], params['goal'], params.get('medical_conditions')
+    ),
+    "personalized_diet_plan": lambda params: get_personalized_diet_plan(
+        params['profile'], params['dietary_preferences']
+    ),
+}
+
+class RecommendationJobExecutor:
+    """Thread pool that runs AI generation jobs and persists their status and results
+
+    Job rows live in the recommendation_jobs table, so a job submitted in one
+    Streamlit run can be polled from any later rerun, page or replica.
+    Cancellation stops queued jobs outright; a job already waiting on the API
+    is marked cancelled and its result is discarded when the call returns.
+
+    Jobs only run in the process that submitted them. If it dies, or a job's
+    final status update fails, nothing would ever finish the row; so any
+    process that reads an unfinished job untouched for longer than the job
+    timeout marks it failed. The timeout defaults to twice the OpenAI call
+    deadline, allowing for time spent queued behind other jobs.
+
+    Finished jobs are cached in memory, so a page that keeps showing one does
+    not query for it on every rerun; only unfinished jobs are read each time.
+    """
+
+    def __init__(self, max_workers=None, timeout_seconds=None, retention_seconds=None):
+        self.table = RecommendationJob.__table__
+        deadline = float(os.environ.get('OPENAI_DEADLINE_SECONDS', 120))
+        self.timeout = timedelta(seconds=timeout_seconds if timeout_seconds is not None else float(
+            os.environ.get('AI_JOB_TIMEOUT_SECONDS', 2 * deadline if deadline > 0 else 600)))
+        self.retention = timedelta(seconds=retention_seconds if retention_seconds is not None else float(
+            os.environ.get('AI_JOB_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS)))
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.environ.get('AI_JOB_WORKERS', 4)),
+            thread_name_prefix="ai-job"
+        )
+        self._futures = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _update(self, job_id, only_if=None, **values):
+        """Update a job row, optionally only while it is in one of the given statuses"""
+        stmt = update(self.table).where(self.table.c.id == job_id).values(
+            updated_at=datetime.utcnow(), **values
+        )
+        if only_if:
+            stmt = stmt.where(self.table.c.status.in_(only_if))
+        with get_engine().begin() as conn:
+            return conn.execute(stmt).rowcount
+
+    def submit(self, kind, params):
+        """Queue a generation job and return its ID"""
+        if kind not in JOB_FUNCTIONS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        with get_engine().begin() as conn:
+            self._expire_and_prune(conn, now)
+            conn.execute(self.table.insert().values(
+                id=job_id, kind=kind, status=QUEUED, params=json.loads(json.dumps(params, default=str)),
+                created_at=now, updated_at=now
+            ))
+        with self._lock:
+            self._futures[job_id] = self._pool.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def _run(self, job_id, kind, params):
+        if not self._update(job_id, only_if=(QUEUED,), status=RUNNING):
+            return
+        try:
+            result = JOB_FUNCTIONS[kind](params)
+            if isinstance(result, dict) and 'error' in result:
+                self._update(job_id, only_if=(RUNNING,), status=FAILED, error=result.get('message'))
+            else:
+                if not isinstance(result, str):
+                    result = json.dumps(result)
+                self._update(job_id, only_if=(RUNNING,), status=SUCCEEDED, result=result)
+        except Exception as e:
+            self._update(job_id, only_if=(RUNNING,), status=FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def _expire_and_prune(self, conn, now):
+        """Fail every stale unfinished job and delete finished jobs past the retention period"""
+        conn.execute(update(self.table).where(
+            self.table.c.status.in_(UNFINISHED_STATUSES),
+            self.table.c.updated_at < now - self.timeout
+        ).values(status=FAILED, error=STALE_JOB_ERROR, updated_at=now))
+        conn.execute(delete(self.table).where(
+            self.table.c.status.in_(FINISHED_STATUSES),
+            self.table.c.updated_at < now - self.retention
+        ))
+
+    def _select(self, conn, job_id):
+        row = conn.execute(select(
+            self.table.c.id, self.table.c.kind, self.table.c.status,
+            self.table.c.result, self.table.c.error,
+            self.table.c.created_at, self.table.c.updated_at
+        ).where(self.table.c.id == job_id)).first()
+        return dict(row._mapping) if row else None
+
+    def get(self, job_id):
+        """Get a job's kind, status, result and error, or None if the ID is unknown
+
+        An unfinished job past the job timeout is marked failed on the way.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            job = self._finished.get(job_id)
+            if job and job['updated_at'] >= now - self.retention:
+                self._finished.move_to_end(job_id)
+                return dict(job)
+            self._finished.pop(job_id, None)
+
+        with get_engine().connect() as conn:
+            job = self._select(conn, job_id)
+        if job and job['status'] in UNFINISHED_STATUSES and job['updated_at'] < now - self.timeout:
+            self._update(job_id, only_if=UNFINISHED_STATUSES, status=FAILED, error=STALE_JOB_ERROR)
+            with get_engine().connect() as conn:
+                job = self._select(conn, job_id)
+        if job and job['status'] in FINISHED_STATUSES:
+            with self._lock:
+                self._finished[job_id] = dict(job)
+                while len(self._finished) > FINISHED_JOB_CACHE_SIZE:
+                    self._finished.popitem(last=False)
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns True if it was still unfinished"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return bool(self._update(job_id, only_if=UNFINISHED_STATUSES, status=CANCELLED))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_job_executor():
+    """Get the process-wide recommendation job executor"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = RecommendationJobExecutor()
+    return _executor
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from data_manager import get_engine, RecommendationCacheEntry
+from recommendation_cache import _normalize, DEFAULT_TTL_SECONDS
+
+# Recommendation kinds whose plans may be reused for a nearby profile
+SIMILARITY_KINDS = ("diet", "personalized_diet_plan")
+
+# Profile differences counted as distance 1.0: 10 years, 5 kg or 10 cm
+NUMERIC_SCALES = {"age": 10.0, "weight": 5.0, "height": 10.0}
+
+# Values that must match exactly; allergies and restrictions are never approximated
+EXACT_PROFILE_FIELDS = ("gender", "activity_level", "goal")
+EXACT_PREFERENCE_FIELDS = ("allergies", "restrictions", "disliked_ingredients")
+
+# Soft preference features: each differing cuisine adds 0.5, each hour of meal-time shift 0.5
+CUISINES = ("italian", "mexican", "chinese", "japanese", "indian", "mediterranean", "american", "thai")
+CUISINE_WEIGHT = 0.5
+MEAL_TIME_WEIGHT = 0.5
+MEALS = ("breakfast", "lunch", "dinner")
+
+def _split_inputs(inputs):
+    """Get (profile, dietary_preferences) from normalized diet or personalized-plan inputs"""
+    if 'profile' in inputs:
+        return inputs['profile'], inputs.get('dietary_preferences') or {}
+    return inputs, {}
+
+def _minutes(value):
+    try:
+        hours, minutes = str(value).split(':')
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+def featurize(inputs):
+    """Turn normalized prompt inputs into (exact-match group key, feature vector)"""
+    profile, preferences = _split_inputs(inputs)
+    group = json.dumps({
+        'profile': {field: profile.get(field) for field in EXACT_PROFILE_FIELDS},
+        'preferences': {field: preferences.get(field) or [] for field in EXACT_PREFERENCE_FIELDS},
+        'has_preferences': bool(preferences)
+    }, sort_keys=True)
+
+    features = [float(profile.get(field) or 0.0) / scale for field, scale in NUMERIC_SCALES.items()]
+    cuisines = set(preferences.get('preferred_cuisines') or [])
+    features.extend(CUISINE_WEIGHT if cuisine in cuisines else 0.0 for cuisine in CUISINES)
+    timing = preferences.get('meal_timing_preferences') or {}
+    for meal in MEALS:
+        minutes = _minutes(timing.get(meal, ''))
+        features.append(MEAL_TIME_WEIGHT * (minutes or 0) / 60.0)
+    features.append(float(timing.get('snacks_count') or 0.0))
+    return hashlib.sha1(group.encode('utf-8')).hexdigest(), np.array(features, dtype=np.float32)
+
+class SimilarPlanIndex:
+    """In-memory nearest-neighbour index over cached recommendation inputs
+
+    Cached responses are grouped by kind plus every exact-match field; within
+    a group each entry is a row in a NumPy feature matrix. A lookup returns the
+    cache key of the closest entry within `threshold` (negative disables reuse),
+    or None. The index reloads from recommendation_cache periodically to pick up
+    plans stored by other processes and replicas.
+    """
+
+    def __init__(self, threshold=None, refresh_seconds=None):
+        self.threshold = threshold if threshold is not None else float(
+            os.environ.get('AI_SIMILARITY_THRESHOLD', 1.0))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.environ.get('AI_SIMILARITY_REFRESH_SECONDS', 300))
+        self.ttl = timedelta(seconds=int(os.environ.get('AI_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)))
+        self._groups = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'hits': 0, 'lookup_seconds': 0.0, 'distance_total': 0.0}
+
+    def _load(self):
+        table = RecommendationCacheEntry.__table__
+        with get_engine().connect() as conn:
+            rows = conn.execute(select(table.c.key, table.c.kind, table.c.inputs).where(
+                table.c.kind.in_(SIMILARITY_KINDS),
+                table.c.inputs.isnot(None),
+                table.c.created_at >= datetime.utcnow() - self.ttl
+            )).all()
+
+        entries = {}
+        for key, kind, inputs in rows:
+            group, vector = featurize(inputs)
+            entries.setdefault((kind, group), ([], []))
+            entries[(kind, group)][0].append(key)
+            entries[(kind, group)][1].append(vector)
+        self._groups = {
+            group: (keys, np.vstack(vectors)) for group, (keys, vectors) in entries.items()
+        }
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._load()
+
+    def add(self, kind, key, inputs):
+        """Index a newly cached response"""
+        if kind not in SIMILARITY_KINDS:
+            return
+        group, vector = featurize(_normalize(inputs))
+        with self._lock:
+            keys, matrix = self._groups.get((kind, group), ([], np.empty((0, len(vector)), dtype=np.float32)))
+            if key in keys:
+                return
+            self._groups[(kind, group)] = (keys + [key], np.vstack([matrix, vector]))
+
+    def lookup(self, kind, inputs):
+        """Get the cache key of the nearest indexed plan within the threshold, or None"""
+        if kind not in SIMILARITY_KINDS or self.threshold < 0:
+            return None
+        started = time.perf_counter()
+        group, vector = featurize(_normalize(inputs))
+        with self._lock:
+            try:
+                self._ensure_loaded()
+            except Exception:
+                return None
+            keys, matrix = self._groups.get((kind, group), ([], None))
+            match = None
+            distance = None
+            if keys:
+                distances = np.sqrt(((matrix - vector) ** 2).sum(axis=1))
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.threshold:
+                    match, distance = keys[nearest], float(distances[nearest])
+
+            self._stats['lookups'] += 1
+            self._stats['lookup_seconds'] += time.perf_counter() - started
+            if match is not None:
+                self._stats['hits'] += 1
+                self._stats['distance_total'] += distance
+        return match
+
+    def discard(self, kind, key):
+        """Drop a key whose cached response has expired or been evicted"""
+        with self._lock:
+            for group, (keys, matrix) in list(self._groups.items()):
+                if group[0] == kind and key in keys:
+                    position = keys.index(key)
+                    self._groups[group] = (
+                        keys[:position] + keys[position + 1:], np.delete(matrix, position, axis=0)
+                    )
+
+    def stats(self, upstream_latency=None):
+        """Get hit rate, lookup cost and (given the average upstream latency) seconds saved"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['indexed'] = sum(len(keys) for keys, _ in self._groups.values())
+        stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+        stats['mean_distance'] = stats['distance_total'] / stats['hits'] if stats['hits'] else 0.0
+        stats['lookup_avg'] = stats['lookup_seconds'] / stats['lookups'] if stats['lookups'] else 0.0
+        if upstream_latency is not None:
+            stats['seconds_saved'] = max(0.0, stats['hits'] * upstream_latency - stats['lookup_seconds'])
+        return stats
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_similar_plan_index():
+    """Get the process-wide similar-plan index"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarPlanIndex()
+    return _index
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce identical in-flight calls so they share one execution
+
+    The first caller for a key runs the function; callers arriving with the
+    same key before it finishes block until it does and receive the same result
+    (or exception). Works across threads and across event loops, so Streamlit
+    script threads and the async recommendation layer share flights.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'coalesced': 0}
+
+    def begin(self, key):
+        """Join or start the flight for a key, returning (flight, is_leader)
+
+        A leader must call complete(); followers call wait(). Use this instead of
+        do() when the leader produces its result incrementally (e.g. a stream).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._stats['coalesced'] += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self._stats['executions'] += 1
+            return flight, True
+
+    def complete(self, key, flight, result=None, error=None):
+        """Publish the leader's result (or exception) to every follower"""
+        flight.result = result
+        flight.error = error
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    @staticmethod
+    def wait(flight):
+        """Block until the leader completes and return its result (or raise its exception)"""
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do(self, key, func, *args, **kwargs):
+        """Run func(*args, **kwargs) once for all concurrent callers with the same key"""
+        flight, leader = self.begin(key)
+        if not leader:
+            return self.wait(flight)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.complete(key, flight, error=e)
+            raise
+        self.complete(key, flight, result=result)
+        return result
+
+    async def do_async(self, key, func, *args, **kwargs):
+        """Async counterpart of do(); func is a coroutine function"""
+        flight, leader = self.begin(key)
+        if not leader:
+            return await asyncio.to_thread(self.wait, flight)
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self.complete(key, flight, error=e)
+            raise
+        self.complete(key, flight, result=result)
+        return result
+
+    def stats(self):
+        """Get upstream executions, coalesced callers and current in-flight keys"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._flights)
+        requests = stats['executions'] + stats['coalesced']
+        stats['coalesced_rate'] = stats['coalesced'] / requests if requests else 0.0
+        return stats
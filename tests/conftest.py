@@ -0,0 +1,11 @@
+import pytest
+import data_manager as data_manager_module
+from data_manager import DataManager
+
+@pytest.fixture
+def data_manager(tmp_path, monkeypatch):
+    """A DataManager on a fresh SQLite database, with the shared engine reset around the test"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    data_manager_module.dispose_engine()
+    yield DataManager()
+    data_manager_module.dispose_engine()
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+import data_manager as data_manager_module
+
+def queries():
+    return data_manager_module.get_pool_stats()['queries']
+
+def test_today_snapshot_reads_totals_and_log_in_one_query(data_manager):
+    data_manager.add_food_entry("Oats", 150, 5, 27, 3)
+    data_manager.add_food_entries([
+        {'food': "Rice", 'calories': 200, 'protein': 4, 'carbs': 45, 'fats': 0.5},
+        {'food': "Old", 'calories': 999, 'protein': 9, 'carbs': 9, 'fats': 9, 'date': date.today() - timedelta(days=1)}
+    ])
+    before = queries()
+    snapshot = data_manager.get_today_snapshot()
+    assert queries() - before == 1
+    assert [entry['food'] for entry in snapshot['log']] == ["Oats", "Rice"]
+    assert snapshot['totals'] == {'calories': 350.0, 'protein': 9.0, 'carbs': 72.0, 'fats': 3.5}
+
+def test_today_snapshot_is_empty_without_entries(data_manager):
+    assert data_manager.get_today_snapshot() == {
+        'totals': {'calories': 0.0, 'protein': 0.0, 'carbs': 0.0, 'fats': 0.0}, 'log': []
+    }
+
+def test_data_manager_survives_dispose_engine(data_manager):
+    data_manager.add_food_entry("Oats", 150, 5, 27, 3)
+    data_manager_module.dispose_engine()
+    data_manager.add_food_entry("Rice", 200, 4, 45, 0.5)
+    assert [entry['food'] for entry in data_manager.get_today_snapshot()['log']] == ["Oats", "Rice"]
+
+def test_rebuilt_quick_add_index_matches_incremental_writes(data_manager):
+    data_manager.add_food_entry("Eggs", 140, 12, 1, 10, date=date.today() - timedelta(days=1))
+    for food in ("Oats", "Rice", "Banana", "Oats"):
+        data_manager.add_food_entry(food, 100, 1, 20, 1)
+
+    def quick_add():
+        return ([food['food'] for food in data_manager.get_recent_foods()],
+                [(food['food'], food['uses']) for food in data_manager.get_frequent_foods()])
+
+    incremental = quick_add()
+    assert incremental[0] == ["Oats", "Banana", "Rice", "Eggs"]
+    data_manager.rebuild_food_frequency()
+    assert quick_add() == incremental
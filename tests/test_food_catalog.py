@@ -0,0 +1,50 @@
+import csv
+import pytest
+from food_catalog import FoodCatalogIndex, build_catalog, normalize
+
+FOODS = [
+    ("Chicken breast", "100 g", 165, 31, 0, 3.6),
+    ("Chickpeas", "1 cup", 269, 14.5, 45, 4.2),
+    ("Brown rice", "1 cup", 216, 5, 45, 1.8),
+    ("Milk 2%", "1 cup (244 ml)", 122, 8.1, 11.7, 4.8),
+    ("Milk whole", "1 cup (244 ml)", 149, 7.7, 11.7, 7.9),
+    ("Crème fraîche", "2 tbsp", 100, 0.6, 0.8, 10.5),
+]
+
+@pytest.fixture
+def catalog(tmp_path):
+    source = tmp_path / "foods.csv"
+    with open(source, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["name", "serving", "calories", "protein", "carbs", "fats"])
+        writer.writerows(FOODS)
+    return FoodCatalogIndex(build_catalog(str(source), cache_dir=str(tmp_path / "cache")))
+
+def names(results):
+    return [food['name'] for food in results]
+
+def test_normalize_keeps_ascii_letters_digits_and_percent():
+    assert normalize("  Milk, 2% (Reduced-Fat)!") == "milk 2% reduced fat"
+    assert normalize("Crème") == "cr me"
+
+@pytest.mark.parametrize("query", ["chicken breast", "chick br", "chiken brest", "CHICKEN"])
+def test_search_finds_partial_and_misspelled_names(catalog, query):
+    assert names(catalog.search(query))[0] == "Chicken breast"
+
+def test_search_matches_percent_in_names(catalog):
+    assert names(catalog.search("milk 2%"))[0] == "Milk 2%"
+
+def test_search_returns_macros_and_respects_limit(catalog):
+    results = catalog.search("milk", limit=1)
+    assert len(results) == 1
+    assert set(results[0]) == {'name', 'serving', 'calories', 'protein', 'carbs', 'fats'}
+
+def test_search_without_usable_query_or_match(catalog):
+    assert catalog.search("") == []
+    assert catalog.search("?!") == []
+    assert catalog.search("zzzz") == []
+
+def test_prefix_matches(catalog):
+    assert sorted(names(catalog.food(int(food)) for food in catalog.prefix_matches("chick"))) == [
+        "Chicken breast", "Chickpeas"
+    ]
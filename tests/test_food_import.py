@@ -0,0 +1,46 @@
+import io
+import json
+from datetime import date, datetime
+import pytest
+from food_import import import_food_log, iter_json_records, validate_food_record
+
+def record(**overrides):
+    return dict({'date': "2024-01-01", 'food': "Oats", 'calories': 150, 'protein': 5, 'carbs': 27, 'fats': 3},
+                **overrides)
+
+def ndjson(*lines):
+    return io.StringIO("".join(line + "\n" for line in lines))
+
+@pytest.mark.parametrize("value", [date(2024, 1, 1), datetime(2024, 1, 1, 8, 30), "2024-01-01", "2024-01-01T08:30:00"])
+def test_validate_accepts_dates_and_date_strings(value):
+    assert validate_food_record(record(date=value))['date'] == date(2024, 1, 1)
+
+@pytest.mark.parametrize("value", [20240101, 2024.0, True, ["2024-01-01"], {'day': 1}, "01/01/2024"])
+def test_validate_rejects_other_date_values(value):
+    with pytest.raises(ValueError, match="invalid date"):
+        validate_food_record(record(date=value))
+
+def test_non_string_date_is_rejected_without_losing_the_chunk(data_manager):
+    stream = ndjson(json.dumps(record()), json.dumps(record(date=20240101)), json.dumps(record(food="Rice")))
+    result = import_food_log(data_manager, stream, 'json')
+    assert (result['inserted'], result['rejected']) == (2, 1)
+    assert result['errors'] == ["record 2: invalid date 20240101, expected YYYY-MM-DD"]
+    assert data_manager.get_nutrition_history()[0]['entries'] == 2
+
+def test_malformed_ndjson_line_is_rejected_and_import_continues(data_manager):
+    stream = ndjson(json.dumps(record()), "{bad json}", "[1, 2]", "", json.dumps(record(food="Rice")))
+    result = import_food_log(data_manager, stream, 'json', chunk_size=1)
+    assert (result['inserted'], result['rejected']) == (2, 2)
+    assert result['errors'][0].startswith("record 2: invalid JSON")
+    assert result['errors'][1] == "record 3: expected a JSON object, got list"
+
+def test_ndjson_lines_split_across_the_first_read():
+    lines = [json.dumps(record(food=f"Food {index}")) for index in range(50)]
+    records = list(iter_json_records(ndjson(*lines), read_size=7))
+    assert [item['food'] for item in records] == [f"Food {index}" for index in range(50)]
+
+def test_json_array_is_read_element_by_element():
+    stream = io.StringIO(json.dumps([record(), record(food="Rice"), 3], indent=2))
+    records = list(iter_json_records(stream, read_size=16))
+    assert [item['food'] for item in records[:2]] == ["Oats", "Rice"]
+    assert isinstance(records[2], ValueError)
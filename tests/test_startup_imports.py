@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+from benchmarks.startup_benchmark import CHILD, DEFERRED_MODULES, ROOT
+
+def test_importing_app_does_not_load_deferred_modules(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    env.pop('OPENAI_API_KEY', None)
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, *DEFERRED_MODULES], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    loaded = [name for name in result.stdout.splitlines()[-1].split(",") if name]
+    assert loaded == [], f"imported at startup but should load on first use: {', '.join(loaded)}"
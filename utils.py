@@ -1,5 +1,6 @@
 import numpy as np
 import base64
+from datetime import date
 
 def calculate_bmr(weight, height, age, gender):
     """Calculate Basal Metabolic Rate using Mifflin-St Jeor Equation"""
@@ -7,25 +8,100 @@ def calculate_bmr(weight, height, age, gender):
         return (10 * weight) + (6.25 * height) - (5 * age) + 5
     return (10 * weight) + (6.25 * height) - (5 * age) - 161
 
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary": 1.2,
+    "Lightly Active": 1.375,
+    "Moderately Active": 1.55,
+    "Very Active": 1.725,
+    "Extra Active": 1.9
+}
+
+MACRO_SPLITS = {
+    "Weight Loss": {"protein": 0.4, "carbs": 0.3, "fats": 0.3},
+    "Muscle Gain": {"protein": 0.3, "carbs": 0.5, "fats": 0.2},
+    "Maintenance": {"protein": 0.3, "carbs": 0.4, "fats": 0.3}
+}
+
+# Energy per gram used to turn calorie shares into gram targets
+CALORIES_PER_GRAM = {"protein": 4, "carbs": 4, "fats": 9}
+
 def calculate_tdee(bmr, activity_level):
     """Calculate Total Daily Energy Expenditure"""
-    activity_multipliers = {
-        "Sedentary": 1.2,
-        "Lightly Active": 1.375,
-        "Moderately Active": 1.55,
-        "Very Active": 1.725,
-        "Extra Active": 1.9
-    }
-    return bmr * activity_multipliers[activity_level]
+    return bmr * ACTIVITY_MULTIPLIERS[activity_level]
 
 def get_macro_split(goal):
     """Return macro nutrient split based on goal"""
-    splits = {
-        "Weight Loss": {"protein": 0.4, "carbs": 0.3, "fats": 0.3},
-        "Muscle Gain": {"protein": 0.3, "carbs": 0.5, "fats": 0.2},
-        "Maintenance": {"protein": 0.3, "carbs": 0.4, "fats": 0.3}
+    return MACRO_SPLITS[goal]
+
+def _lookup(labels, table):
+    """Map an array of category labels to values, raising KeyError on unknown labels"""
+    labels = np.asarray(labels)
+    if labels.ndim == 0:
+        return np.array(table[labels.item()], dtype=float)
+    # One equality pass per known label beats sorting the whole array with np.unique
+    values = np.full(labels.shape, np.nan)
+    for label, value in table.items():
+        values[labels == label] = value
+    unknown = np.isnan(values)
+    if unknown.any():
+        raise KeyError(labels[unknown][0])
+    return values
+
+def calculate_bmr_array(weight, height, age, gender):
+    """Vectorized calculate_bmr over arrays of weight, height, age and gender labels"""
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    age = np.asarray(age, dtype=float)
+    offset = np.where(np.asarray(gender) == "Male", 5.0, -161.0)
+    return (10 * weight) + (6.25 * height) - (5 * age) + offset
+
+def calculate_tdee_array(bmr, activity_level):
+    """Vectorized calculate_tdee over arrays of BMR values and activity level labels"""
+    return np.asarray(bmr, dtype=float) * _lookup(activity_level, ACTIVITY_MULTIPLIERS)
+
+def get_macro_split_array(goal):
+    """Vectorized get_macro_split, returning protein/carbs/fats share arrays"""
+    return {
+        macro: _lookup(goal, {name: split[macro] for name, split in MACRO_SPLITS.items()})
+        for macro in CALORIES_PER_GRAM
     }
-    return splits[goal]
+
+def calculate_daily_targets(weight, height, age, gender, activity_level, goal):
+    """Compute daily calorie and macro gram targets for many profiles at once
+
+    Every argument may be a scalar or an array (a DataFrame column works too);
+    they broadcast against each other. Returns a dict of float arrays:
+    calories, protein, carbs and fats, matching the profile page's targets.
+    """
+    calories = calculate_tdee_array(calculate_bmr_array(weight, height, age, gender), activity_level)
+    split = get_macro_split_array(goal)
+    targets = {'calories': calories}
+    for macro, per_gram in CALORIES_PER_GRAM.items():
+        targets[macro] = calories * split[macro] / per_gram
+    return targets
+
+def calculate_targets_frame(profiles):
+    """Compute daily targets for a DataFrame with weight, height, age, gender, activity_level and goal columns"""
+    return calculate_daily_targets(
+        profiles['weight'].to_numpy(),
+        profiles['height'].to_numpy(),
+        profiles['age'].to_numpy(),
+        profiles['gender'].to_numpy(),
+        profiles['activity_level'].to_numpy(),
+        profiles['goal'].to_numpy()
+    )
+
+def calculate_target_drift(weight_history, profile):
+    """Recompute daily targets for every historical weight entry of one profile"""
+    weights = np.array([entry['weight'] for entry in weight_history], dtype=float)
+    return calculate_daily_targets(
+        weights,
+        profile['height'],
+        profile['age'],
+        profile['gender'],
+        profile['activity_level'],
+        profile['goal']
+    )
 
 def get_workout_recommendation(goal, fitness_level):
     """Generate workout recommendations based on goal and fitness level"""
@@ -84,6 +160,86 @@ def get_workout_recommendation(goal, fitness_level):
     }
     return workouts[goal][fitness_level]
 
+def lttb_downsample(x, y, threshold):
+    """Pick indices of at most `threshold` points using Largest-Triangle-Three-Buckets
+
+    Keeps the first and last points and, for each bucket in between, the point
+    forming the largest triangle with the previously kept point and the next
+    bucket's average, which preserves peaks and dips of the series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+def bucket_series(x, y, bucket_width):
+    """Aggregate a series sorted by x into fixed-width buckets
+
+    Returns (bucket_start, minimum, mean, maximum) arrays, one entry per non-empty bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return x, y, y, y
+
+    keys = np.floor(x / bucket_width)
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    counts = np.diff(np.concatenate((starts, [len(x)])))
+    return (
+        keys[starts] * bucket_width,
+        np.minimum.reduceat(y, starts),
+        np.add.reduceat(y, starts) / counts,
+        np.maximum.reduceat(y, starts)
+    )
+
+def downsample_weight_history(history, max_points=500):
+    """Reduce a date-ordered weight history to at most max_points for charting
+
+    Returns (mode, data): mode "raw" or "lttb" with a list of {date, weight} dicts,
+    or "weekly"/"monthly" with {date, weight, min, max} bucket dicts when the span
+    is too long for individual readings to be distinguishable anyway.
+    """
+    if len(history) <= max_points:
+        return "raw", history
+
+    days = np.array([entry['date'].toordinal() for entry in history], dtype=float)
+    weights = np.array([entry['weight'] for entry in history], dtype=float)
+
+    if days[-1] - days[0] <= 366:
+        return "lttb", [history[i] for i in lttb_downsample(days, weights, max_points)]
+
+    for mode, width in (("weekly", 7), ("monthly", 30)):
+        starts, minimum, mean, maximum = bucket_series(days, weights, width)
+        if len(starts) <= max_points or mode == "monthly":
+            return mode, [{
+                'date': date.fromordinal(int(start)),
+                'weight': float(avg),
+                'min': float(low),
+                'max': float(high)
+            } for start, low, avg, high in zip(starts, minimum, mean, maximum)]
+
 def get_default_profile_photo():
     """Generate default profile photo as base64 encoded data URI"""
     svg_string = """